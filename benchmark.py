@@ -0,0 +1,64 @@
+from checker.verilog import VerilogProcessor
+import argparse
+import os
+import random
+import tempfile
+import time
+
+
+def generate_netlist(path: str, gate_count: int, input_width: int, output_width: int, seed: int = 0):
+    """
+    Writes a flattened NAND netlist shaped like the output of `abc -g NAND; splitnets -ports; write_verilog -noattr`:
+    escaped bit-blasted ports, one wire and one assignment per gate.
+    """
+    rng = random.Random(seed)
+    inputs = [f'\\a[{i}] ' for i in range(input_width // 2)] + [f'\\b[{i}] ' for i in range(input_width - input_width // 2)]
+    outputs = [f'\\r[{i}] ' for i in range(output_width)]
+    wires = [f'_{i:0{len(str(gate_count))}d}_' for i in range(gate_count)]
+
+    with open(path, 'w') as f:
+        f.write('/* Generated by benchmark.py */\n\n')
+        f.write(f'module stress_g{gate_count}_p{input_width + output_width}({", ".join(inputs + outputs)});\n')
+        for wire in wires:
+            f.write(f'  wire {wire};\n')
+        for port in inputs:
+            f.write(f'  input {port};\n  wire {port};\n')
+        for port in outputs:
+            f.write(f'  output {port};\n  wire {port};\n')
+        signals = list(inputs)
+        for wire in wires:
+            f.write(f'  assign {wire} = ~({rng.choice(signals)} & {rng.choice(signals)});\n')
+            signals.append(wire)
+        for port in outputs:
+            f.write(f'  assign {port} = {rng.choice(wires)};\n')
+        f.write('endmodule\n')
+
+
+def benchmark():
+    parser = argparse.ArgumentParser(description='Times port renaming on generated netlists of growing size.')
+    parser.add_argument('--gates', type=int, nargs='+', default=[1000, 10000, 100000, 200000])
+    parser.add_argument('--ports', type=int, default=512, help='number of input and output ports')
+    parser.add_argument('--corpus', default=None, help='directory to keep the generated netlists in')
+    args = parser.parse_args()
+
+    corpus_dir = args.corpus or tempfile.mkdtemp(prefix='stress_corpus_')
+    os.makedirs(corpus_dir, exist_ok=True)
+    processor = VerilogProcessor()
+    input_width, output_width = args.ports // 2, args.ports - args.ports // 2
+
+    print(f'{"gates":>8} {"ports":>6} {"MB":>7} {"seconds":>8} {"us/gate":>8}')
+    for gate_count in args.gates:
+        path = os.path.join(corpus_dir, f'stress_g{gate_count}_p{args.ports}.v')
+        if not os.path.exists(path):
+            generate_netlist(path, gate_count, input_width, output_width)
+        start = time.perf_counter()
+        _, port_list, input_dict, output_dict = processor._rename_variables(path, path + '.renamed')
+        elapsed = time.perf_counter() - start
+
+        assert len(port_list) == args.ports and len(input_dict) == input_width and len(output_dict) == output_width
+        size = os.path.getsize(path) / 2 ** 20
+        print(f'{gate_count:>8} {args.ports:>6} {size:>7.1f} {elapsed:>8.3f} {elapsed / gate_count * 1e6:>8.2f}')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -1,7 +1,11 @@
-from typing import List, Literal, Union, Dict, Tuple
-from .synthesizer import Synthesizer
+from typing import List, Literal, Union, Dict, Tuple, Optional
+from .synthesizer import Synthesizer, PROFILE_FULL
 from .verilog import VerilogProcessor
 from .circuit import Circuit
+from .search import WorstCaseSearch
+from .counterexample import CounterexampleStore
+from .cone import ConeAnalyzer
+from .golden import GoldenModel
 import os
 import subprocess
 import random
@@ -23,10 +27,37 @@ class Checker:
                  output_order: List[str],
                  metric: Literal["wae", "nmed", "med", "er"],
                  et: Union[float, int]  = float('inf'),
-                 sample_count: int = 100) -> None:
+                 sample_count: int = 100,
+                 search: Optional[Literal["hill", "anneal", "genetic"]] = None,
+                 search_budget: int = 1024,
+                 search_time: Optional[float] = None,
+                 counterexample_dir: Optional[str] = os.path.join("Checker.bak", "counterexamples"),
+                 known_count: int = 32,
+                 prune_cones: bool = True,
+                 synthesis_profile: Literal["full", "fast", "aig"] = PROFILE_FULL,
+                 golden_model: bool = True,
+                 temp_dir: str = "Checker.bak") -> None:
         """
         Initializes the Checker with paths to two Verilog files (exact and approximate),
         input/output port orders, and comparison parameters.
+
+        With metric `wae`, setting `search` replaces sampling with a guided worst-case search that
+        simulates at most `search_budget` patterns (or runs for `search_time` seconds) and stops at
+        the first ET breach.
+
+        With metric `wae` and a finite ET, the `known_count` inputs that most often breached the ET of
+        the same exact circuit (kept under `counterexample_dir`, None to disable) are simulated first.
+
+        With `prune_cones`, outputs whose fan-in cones are structurally identical in both netlists are
+        considered equal, and samples only enumerate the input bits feeding the other outputs.
+
+        `synthesis_profile` selects the Yosys script; `fast` skips ABC mapping and is enough for simulation.
+
+        With `golden_model`, the exact circuit is evaluated directly from its behavioral RTL when it only uses
+        continuous assignments, instead of being simulated; it is then synthesized only for cone pruning.
+        The exact netlist is synthesized once and reused by later checks as long as its source is unchanged.
+
+        Synthesized netlists, testbenches and simulation results are kept under `temp_dir`.
         """
         self.circuit1 = Circuit()
         self.circuit2 = Circuit()
@@ -42,46 +73,113 @@ class Checker:
 
         self.metric = metric
         self.et = et
+        self.search = search
+        self.search_budget = search_budget
+        self.search_time = search_time
+        self.witness = None
+        self.prune_cones = prune_cones
+        self.differing_outputs = None  # outputs whose cones differ, None if the analysis did not run
+        self.support_bits = None  # sample bits feeding the differing outputs
+        self.golden = GoldenModel.from_file(exact_path) if golden_model else None
 
         # Initialize synthesis tools
+        self.synthesis_profile = synthesis_profile
         self.verilog_processor = VerilogProcessor()
         self.synthesizer = Synthesizer(self.verilog_processor)
 
         # Set up a persistent `temp` directory
-        self.temp_dir = "Checker.bak"
+        self.temp_dir = temp_dir
         os.makedirs(self.temp_dir, exist_ok=True)
 
-        # Define paths for synthesized files
+        # Define paths for synthesized files; netlists of different profiles never overwrite each other
         exact_file_base_name = exact_path[:-2]
         approx_file_base_name = approx_path[:-2]
-        self.circuit1.synth_path = os.path.join(self.temp_dir, f'{os.path.basename(exact_file_base_name)}_syn.v')
-        self.circuit2.synth_path = os.path.join(self.temp_dir, f'{os.path.basename(approx_file_base_name)}_syn.v')
+        profile_suffix = '' if synthesis_profile == PROFILE_FULL else f'_{synthesis_profile}'
+        self.circuit1.synth_path = os.path.join(self.temp_dir, f'{os.path.basename(exact_file_base_name)}{profile_suffix}_syn.v')
+        self.circuit2.synth_path = os.path.join(self.temp_dir, f'{os.path.basename(approx_file_base_name)}{profile_suffix}_syn.v')
+
+        # Past ET breaches of the same exact circuit
+        self.known_count = known_count
+        self.counterexamples = None
+        if counterexample_dir:
+            # samples are encoded in the input order of the exact circuit
+            self.counterexamples = CounterexampleStore(counterexample_dir,
+                                                       f'{os.path.basename(exact_file_base_name)}_ipo{self.circuit1.input_order}')
 
         # Prepare circuits for synthesis and simulation
         self._prepare_circuits()
 
     def _prepare_circuits(self):
         """Synthesize both circuits and set up their properties."""
-        output_path1, name1, portlist1, input_dict1, output_dict1 = self.synthesizer.synthesize(self.circuit1.path, self.circuit1.synth_path)
-        output_path2, name2, portlist2, input_dict2, output_dict2 = self.synthesizer.synthesize(self.circuit2.path, self.circuit2.synth_path)
-
-        # Proceed if files exist, otherwise raise an error
-        if not os.path.exists(self.circuit1.synth_path):
-            raise FileNotFoundError(Fore.RED + f"Synthesis failed to create {self.circuit1.synth_path}")
+        output_path2, name2, portlist2, input_dict2, output_dict2 = self.synthesizer.synthesize(self.circuit2.path, self.circuit2.synth_path, self.synthesis_profile)
         if not os.path.exists(self.circuit2.synth_path):
             raise FileNotFoundError(Fore.RED + f"Synthesis failed to create {self.circuit2.synth_path}")
-
-        self.circuit1.name, self.circuit2.name = name1, name2
-        self.circuit1.input_dict, self.circuit2.input_dict = input_dict1, input_dict2
-        self.circuit1.output_dict, self.circuit2.output_dict = output_dict1, output_dict2
-        self.circuit1.input_count = self.get_num_inputs(input_dict1)
+        self.circuit2.name = name2
+        self.circuit2.input_dict, self.circuit2.output_dict = input_dict2, output_dict2
         self.circuit2.input_count = self.get_num_inputs(input_dict2)
-        self.circuit1.output_count = self.get_num_outputs(output_dict1)
         self.circuit2.output_count = self.get_num_outputs(output_dict2)
 
+        # The golden model replaces the exact netlist, which is still needed by the cone analysis
+        if self.golden is not None and not self.prune_cones:
+            self.circuit1.name = self.golden.name
+            self.circuit1.input_count = self.golden.input_count
+            self.circuit1.output_count = self.golden.output_count
+        else:
+            # the exact circuit is shared by all its approximations, so its netlist is reused while its source is unchanged
+            output_path1, name1, portlist1, input_dict1, output_dict1 = self.synthesizer.synthesize(self.circuit1.path, self.circuit1.synth_path, self.synthesis_profile, reuse=True)
+            if not os.path.exists(self.circuit1.synth_path):
+                raise FileNotFoundError(Fore.RED + f"Synthesis failed to create {self.circuit1.synth_path}")
+            self.circuit1.name = name1
+            self.circuit1.input_dict, self.circuit1.output_dict = input_dict1, output_dict1
+            self.circuit1.input_count = self.get_num_inputs(input_dict1)
+            self.circuit1.output_count = self.get_num_outputs(output_dict1)
+            if self.golden is not None and (self.golden.input_count, self.golden.output_count) != (self.circuit1.input_count, self.circuit1.output_count):
+                print(Fore.YELLOW + f'[W]: golden model ports do not match the synthesized {self.circuit1.name}, simulating it instead')
+                self.golden = None
+
         assert self.circuit1.input_count == self.circuit2.input_count, "Input counts are not equal"
         assert self.circuit1.output_count == self.circuit2.output_count, "Output counts are not equal"
 
+        # the exact netlist may be absent when the golden model replaced it, so rely on whether it was prepared now
+        if self.prune_cones and self.circuit1.input_dict is not None:
+            self._analyze_cones()
+
+    def _analyze_cones(self):
+        """Finds the outputs whose fan-in cones differ between the two netlists and the sample bits feeding them."""
+        if self.circuit1.input_order != self.circuit2.input_order or self.circuit1.output_order != self.circuit2.output_order:
+            return
+        analyzer = ConeAnalyzer()
+        cones = []
+        for circuit in (self.circuit1, self.circuit2):
+            with open(circuit.synth_path, 'r') as f:
+                cones.append(analyzer.analyze(f.read()))
+        if cones[0] is None or cones[1] is None:
+            return
+
+        self.differing_outputs, port_mask = analyzer.compare(cones[0], cones[1])
+        port_of_bit = self.input_ports_of_bits(self.circuit1)
+        self.support_bits = [b for b in range(self.circuit1.input_count) if (port_mask >> port_of_bit[b]) & 1]
+        print(Fore.BLUE + f'[I]: {len(self.differing_outputs)}/{self.circuit1.output_count} outputs differ structurally, '
+                          f'fed by {len(self.support_bits)}/{self.circuit1.input_count} input bits')
+
+    def input_ports_of_bits(self, circuit: Circuit) -> List[int]:
+        """Returns, for each bit of an integer sample, the index of the input port it drives in the testbench."""
+        ports = []
+        for bit in range(circuit.input_count):
+            binary_sample = self.integer_sample_to_binary(circuit, 1 << bit)
+            pi_index = circuit.input_count - 1 - binary_sample.index('1')
+            ports.append(pi_index if circuit.input_order == INPUT_ORDER_TYPE1 else circuit.input_count - 1 - pi_index)
+        return ports
+
+    def is_pruned(self) -> bool:
+        """Returns True if samples can be restricted to the support of the differing outputs."""
+        # the relative error also depends on the value of the equal outputs
+        return self.support_bits is not None and self.metric != "nmed"
+
+    def deposit(self, index: int) -> int:
+        """Spreads the bits of `index` over the support bits of a sample; all other bits are zero."""
+        return sum(1 << bit for i, bit in enumerate(self.support_bits) if (index >> i) & 1)
+
     def get_num_inputs(self, input_dict: Dict) -> int:
         """Returns the bitwidth of the module's input."""
         return sum(width for _, width in input_dict.values())
@@ -90,6 +188,28 @@ class Checker:
         """Returns the bitwidth of the module's output."""
         return sum(width for _, width in output_dict.values())
 
+    def run_circuit(self, circuit: Circuit):
+        """Produces the outputs of a circuit for its simulation pattern, from the golden model if there is one."""
+        if circuit is self.circuit1 and self.golden is not None:
+            self.evaluate_golden(circuit)
+        else:
+            self.simulate(circuit)
+            self.import_results(circuit)
+
+    def evaluate_golden(self, circuit: Circuit):
+        """Evaluates the golden model and formats its outputs like the testbench `$display` of `po`."""
+        print(Fore.BLUE + f'[I]: evaluating golden model of {circuit.name}..')
+        input_ports = self.input_ports_of_bits(circuit)
+        identity = input_ports == list(range(circuit.input_count))
+        width = circuit.output_count
+        outputs = []
+        for sample in circuit.simulation_pattern:
+            word = sample if identity else sum(((sample >> bit) & 1) << port for bit, port in enumerate(input_ports))
+            binary_output = f'{self.golden.evaluate_word(word):0{width}b}'
+            # with output order 2, output port j drives po[width - 1 - j]
+            outputs.append((binary_output[::-1] if circuit.output_order == OUTPUT_ORDER_TYPE2 else binary_output) + '\n')
+        circuit.simulation_output = outputs
+
     def simulate(self, circuit: Circuit):
         """Simulates a circuit by creating and running a testbench."""
         print(Fore.BLUE + f'[I]: simulating started..')
@@ -101,6 +221,21 @@ class Checker:
 
     def check(self) -> Tuple[Union[None, float, int], bool]:
         """Runs simulation and either checks equivalence or evaluates the circuits."""
+        if self.differing_outputs == []:
+            print(Fore.BLUE + f'[I]: all output cones are structurally identical, skipping simulation')
+            return 0, 0 <= self.et
+
+        if self.metric == "wae" and self.et != float('inf'):
+            error, witness = self.check_known_breaches()
+            if witness is not None:
+                self.witness = witness
+                return error, False
+
+        if self.search and self.metric == "wae":
+            error, self.witness = self.search_wae(self.search)
+            if error > self.et:
+                self.record_breaches([self.witness], [error])
+            return error, error <= self.et
 
         samples = self.generate_samples(self.sample_count)
         self.circuit1.simulation_pattern = samples
@@ -108,13 +243,67 @@ class Checker:
 
         assert self.circuit1.simulation_pattern == self.circuit2.simulation_pattern, "Simulation patterns are not the same"
 
-        self.simulate(self.circuit1)
-        self.import_results(self.circuit1)
-        self.simulate(self.circuit2)
-        self.import_results(self.circuit2)
+        self.run_circuit(self.circuit1)
+        self.run_circuit(self.circuit2)
 
+        if self.metric == "wae":
+            self.record_breaches(samples, self.result_errors())
         return self.check_circuits(self.circuit1, self.circuit2)
 
+    def check_known_breaches(self) -> Tuple[int, Optional[int]]:
+        """
+        Simulates, in one batch, the inputs that breached the ET of the same exact circuit before.
+        Returns the largest error among them and its input, or (-1, None) if none of them breaches the ET.
+        """
+        if self.counterexamples is None:
+            return -1, None
+        known = [s for s in self.counterexamples.top(self.known_count) if s < (1 << self.circuit1.input_count)]
+        if not known:
+            return -1, None
+        print(Fore.BLUE + f'[I]: simulating {len(known)} known counterexamples first...')
+        errors = self.sample_errors(known)
+        self.record_breaches(known, errors)
+        error, witness = max(zip(errors, known))
+        return (error, witness) if error > self.et else (-1, None)
+
+    def record_breaches(self, samples: List[int], errors: List[int], limit: int = 16):
+        """Records the (at most `limit`) samples with the largest errors above the ET in the counterexample store."""
+        if self.counterexamples is None:
+            return
+        breaches = sorted(((e, s) for s, e in zip(samples, errors) if e > self.et), reverse=True)[:limit]
+        self.counterexamples.record(s for _, s in breaches)
+
+    def search_wae(self, strategy: Literal["hill", "anneal", "genetic"]) -> Tuple[int, Optional[int]]:
+        """Searches for the input with the largest absolute error; returns the error and its witness."""
+        target = self.et if self.et != float('inf') else None
+        if not self.is_pruned():
+            searcher = WorstCaseSearch(self.circuit1.input_count, self.sample_errors, strategy=strategy,
+                                       max_evaluations=self.search_budget, time_budget=self.search_time, target=target)
+            return searcher.run()
+
+        # search only over the support bits of the differing outputs
+        if not self.support_bits:
+            return self.sample_errors([0])[0], 0
+        searcher = WorstCaseSearch(len(self.support_bits),
+                                   lambda indices: self.sample_errors([self.deposit(i) for i in indices]),
+                                   strategy=strategy, max_evaluations=self.search_budget,
+                                   time_budget=self.search_time, target=target)
+        error, index = searcher.run()
+        return error, self.deposit(index) if index is not None else None
+
+    def sample_errors(self, samples: List[int]) -> List[int]:
+        """Simulates both circuits on a batch of samples and returns the absolute error of each sample."""
+        self.circuit1.simulation_pattern = samples
+        self.circuit2.simulation_pattern = samples
+        self.run_circuit(self.circuit1)
+        self.run_circuit(self.circuit2)
+        return self.result_errors()
+
+    def result_errors(self) -> List[int]:
+        """Returns the absolute error of each sample of the last simulation of both circuits."""
+        return [abs(int(a.strip(), 2) - int(b.strip(), 2))
+                for a, b in zip(self.circuit1.simulation_output, self.circuit2.simulation_output)]
+
     # ===================== For external use =======================
     @classmethod
     def Check(cls, exact_path: str,
@@ -123,12 +312,40 @@ class Checker:
                  output_order: List[str],
                  metric: Literal["wae", "nmed", "med", "er"],
                  et: Union[float, int]  = float('inf'),
-                 sample_count: int = 100):
-        checker_obj = cls(exact_path, approx_path, input_order, output_order, metric, et)
-        return checker_obj.check()
+                 sample_count: int = 100,
+                 search: Optional[Literal["hill", "anneal", "genetic"]] = None,
+                 search_budget: int = 1024,
+                 search_time: Optional[float] = None,
+                 counterexample_dir: Optional[str] = os.path.join("Checker.bak", "counterexamples"),
+                 known_count: int = 32,
+                 prune_cones: bool = True,
+                 synthesis_profile: Literal["full", "fast", "aig"] = PROFILE_FULL,
+                 golden_model: bool = True,
+                 temp_dir: str = "Checker.bak"):
+        """
+        Checks an approximate circuit against its exact counterpart.
+
+        Returns:
+            Tuple: (error, passed); with `search`, (error, passed, witness), where the witness is the input
+            sample that produced the error (None if no simulation was needed).
+        """
+        checker_obj = cls(exact_path, approx_path, input_order, output_order, metric, et, sample_count,
+                          search, search_budget, search_time, counterexample_dir, known_count, prune_cones,
+                          synthesis_profile, golden_model, temp_dir)
+        error, passed = checker_obj.check()
+        if search:
+            return error, passed, checker_obj.witness
+        return error, passed
 
     def generate_samples(self, sample_count: int) -> List[int]:
         """Generates simulation patterns based on the input count."""
+        if self.is_pruned():
+            space = 1 << len(self.support_bits)
+            if sample_count >= space:
+                print(Fore.BLUE + f'[I]: enumerating all {space} combinations of {len(self.support_bits)} support bits...')
+            else:
+                print(Fore.BLUE + f'[I]: generating {sample_count} samples over {len(self.support_bits)} support bits...')
+            return [self.deposit(index) for index in range(min(sample_count, space))]
         print(Fore.BLUE + f'[I]: generating {sample_count} random samples...')
         return list(range(sample_count))
 
@@ -0,0 +1,216 @@
+import re
+import hashlib
+from typing import Dict, List, Optional, Tuple
+import colorama
+from colorama import Fore, Style
+from .verilog import VerilogProcessor
+colorama.init(autoreset=True)
+
+RANGE_PATTERN = re.compile(r'\[\s*(\d+)\s*:\s*(\d+)\s*\]')
+DECLARATION_PATTERN = re.compile(r'^(input|output|wire|reg|inout)\b\s*(signed\b)?\s*(\[\s*\d+\s*:\s*\d+\s*\])?\s*(.*)$', re.DOTALL)
+ASSIGN_PATTERN = re.compile(r'^assign\s+(.+?)\s*=\s*(.+)$', re.DOTALL)
+
+
+class ConeAnalyzer:
+    """
+    This class performs a static cone-of-influence analysis over a synthesized, port-renamed netlist: for every
+    output port it computes a structural digest of its transitive fan-in cone and the set of inputs feeding it.
+    """
+    def __init__(self) -> None:
+        self.verilog_processor = VerilogProcessor()  # shares its tokenizer with the port renaming
+
+    def analyze(self, verilog_str: str) -> Optional[Dict[str, Tuple[str, int]]]:
+        """
+        Analyzes a flat netlist made of continuous assignments.
+
+        Args:
+            verilog_str (str): The synthesized Verilog code as a single string.
+
+        Returns:
+            Optional[Dict[str, Tuple[str, int]]]: For each output port, the structural digest of its cone and a
+            bitmask of the `in<i>` ports in its support (bit i set for `in<i>`); None if the netlist contains
+            constructs the analysis does not understand.
+        """
+        parsed = self._parse(verilog_str)
+        if parsed is None:
+            return None
+        inputs, outputs, widths, drivers, signed = parsed
+        if not all(re.fullmatch(r'in\d+', name) and widths[name] == 1 for name in inputs):
+            print(Fore.YELLOW + '[W]: cone analysis skipped, inputs are not renamed single-bit ports')
+            return None
+
+        digests: Dict[str, str] = {}
+        supports: Dict[str, int] = {}
+        for name in inputs:
+            digests[name] = self._digest('input', name, 'signed' if name in signed else '')
+            supports[name] = 1 << int(name[2:])
+
+        for output in outputs:
+            if not self._visit(output, inputs, widths, drivers, signed, digests, supports):
+                return None
+        return {output: (digests[output], supports[output]) for output in outputs}
+
+    def compare(self, exact: Dict[str, Tuple[str, int]], approx: Dict[str, Tuple[str, int]]) -> Tuple[List[str], int]:
+        """
+        Compares the output cones of two analyzed netlists.
+
+        Returns:
+            Tuple[List[str], int]: The outputs whose cones differ structurally, and the bitmask of the input
+            ports feeding any of them in either netlist.
+        """
+        differing = [out for out in exact if out not in approx or exact[out][0] != approx[out][0]]
+        differing += [out for out in approx if out not in exact]
+        support = 0
+        for out in differing:
+            support |= exact.get(out, ('', 0))[1] | approx.get(out, ('', 0))[1]
+        return differing, support
+
+    # ====================== PARSING ======================
+    def _parse(self, verilog_str: str):
+        """
+        Splits the netlist into declarations and assignments.
+
+        Returns:
+            Tuple[set, List[str], Dict[str, int], Dict[str, Tuple[str, List[str]]], set]: input names, output
+            names (in declaration order), signal widths, for each driven signal the template of its expression
+            with the operand names, and the names declared `signed`; None on unsupported constructs.
+        """
+        verilog_str = re.sub(r'/\*.*?\*/', '', verilog_str, flags=re.DOTALL)
+        verilog_str = re.sub(r'//[^\n]*', '', verilog_str)
+
+        inputs, outputs = set(), []
+        widths: Dict[str, int] = {}
+        drivers: Dict[str, Tuple[str, List[str]]] = {}
+        signed = set()
+        for statement in verilog_str.split(';'):
+            statement = statement.strip()
+            if not statement or statement == 'endmodule':
+                continue
+            if statement.startswith('endmodule'):
+                statement = statement[len('endmodule'):].strip()
+            if statement.startswith('module'):
+                continue
+
+            declaration = DECLARATION_PATTERN.match(statement)
+            if declaration:
+                kind, is_signed, vector_range, names = declaration.groups()
+                width = 1
+                if vector_range:
+                    msb, lsb = RANGE_PATTERN.search(vector_range).groups()
+                    width = abs(int(msb) - int(lsb)) + 1
+                for name in (n.strip() for n in names.split(',')):
+                    if not name:
+                        continue
+                    widths[name] = width
+                    if is_signed:
+                        signed.add(name)
+                    if kind == 'input':
+                        inputs.add(name)
+                    elif kind == 'output' and name not in outputs:
+                        outputs.append(name)
+                continue
+
+            assignment = ASSIGN_PATTERN.match(statement)
+            if not assignment:
+                print(Fore.YELLOW + f'[W]: cone analysis skipped, unsupported statement: {statement[:60]}')
+                return None
+            lhs, rhs = assignment.group(1).strip(), assignment.group(2)
+            if not re.fullmatch(r'(?:\\\S+|[A-Za-z_][\w$]*)(?:\s*\[\s*\d+\s*\])?', lhs):
+                print(Fore.YELLOW + f'[W]: cone analysis skipped, unsupported assignment target: {lhs[:60]}')
+                return None
+            template, operands = self._template(rhs)
+            if template is None:
+                return None
+            drivers[self._normalize(lhs)] = (template, operands)
+        return inputs, outputs, widths, drivers, signed
+
+    def _template(self, rhs: str) -> Tuple[Optional[str], List[str]]:
+        """Replaces identifiers of an expression with positional placeholders; returns the template and operands."""
+        template, operands = [], []
+        tokens = [(kind, text) for kind, text, _ in self.verilog_processor._tokenize(rhs)
+                  if kind != 'comment' and text.strip()]
+        index = 0
+        while index < len(tokens):
+            kind, text = tokens[index]
+            index += 1
+            if kind == 'ident':
+                # a bit select belongs to its operand: `\b [3]` is the operand `\b[3]`
+                select = [token for _, token in tokens[index:index + 3]]
+                if len(select) == 3 and select[0] == '[' and select[1].isdigit() and select[2] == ']':
+                    text += f'[{select[1]}]'
+                    index += 3
+                template.append('$')
+                operands.append(self._normalize(text))
+            elif text == '[':
+                # part selects of internal vectors are left to simulation
+                return None, []
+            else:
+                template.append(re.sub(r'\s+', '', text))
+        return ' '.join(template), operands
+
+    def _normalize(self, name: str) -> str:
+        """Removes the whitespace yosys puts between escaped names and bit selects."""
+        return re.sub(r'\s+(?=\[)|(?<=\[)\s+|\s+(?=\])', '', name.strip())
+
+    # ====================== CONE TRAVERSAL ======================
+    def _visit(self, root: str, inputs: set, widths: Dict[str, int], drivers: Dict, signed: set,
+               digests: Dict[str, str], supports: Dict[str, int]) -> bool:
+        """
+        Computes the digest and support of `root` and of its whole fan-in cone, iteratively
+        so that deep netlists do not hit the recursion limit.
+
+        Returns:
+            bool: False if the cone contains an undriven signal or a combinational loop.
+        """
+        stack = [(root, False)]
+        on_path = set()
+        while stack:
+            name, expanded = stack.pop()
+            if name in digests:
+                continue
+            base, index = self._split_select(name)
+            if name not in drivers and base in digests:
+                digests[name] = self._digest('select', str(index), digests[base])
+                supports[name] = supports[base]
+                continue
+            if name not in drivers:
+                if base in drivers and base != name:
+                    if expanded:
+                        digests[name] = self._digest('select', str(index), digests[base])
+                        supports[name] = supports[base]
+                    else:
+                        stack.append((name, True))
+                        stack.append((base, False))
+                    continue
+                print(Fore.YELLOW + f'[W]: cone analysis skipped, undriven signal {name}')
+                return False
+
+            template, operands = drivers[name]
+            if expanded:
+                on_path.discard(name)
+                support = 0
+                for operand in operands:
+                    support |= supports[operand]
+                # the width and signedness of a target decide how its expression is extended
+                kind = f'{widths.get(name, 1)}{"s" if name in signed else ""}'
+                digests[name] = self._digest(template, kind, *(digests[o] for o in operands))
+                supports[name] = support
+                continue
+            if name in on_path:
+                print(Fore.YELLOW + f'[W]: cone analysis skipped, combinational loop through {name}')
+                return False
+            on_path.add(name)
+            stack.append((name, True))
+            stack.extend((operand, False) for operand in operands if operand not in digests)
+        return True
+
+    def _split_select(self, name: str) -> Tuple[str, Optional[int]]:
+        """Splits `name[3]` into (`name`, 3)."""
+        match = re.fullmatch(r'(.+?)\[(\d+)\]', name)
+        if match and not name.startswith('\\'):
+            return match.group(1), int(match.group(2))
+        return name, None
+
+    def _digest(self, *parts: str) -> str:
+        """Returns a stable digest of the given parts."""
+        return hashlib.sha1('\x00'.join(parts).encode()).hexdigest()
@@ -0,0 +1,134 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from tempfile import mkstemp
+from typing import Dict, List, Iterable, Optional, Tuple
+import colorama
+from colorama import Fore, Style
+colorama.init(autoreset=True)
+try:
+    import fcntl
+except ImportError:  # no advisory locks on Windows; concurrent checks may then lose each other's breaches
+    fcntl = None
+
+
+class CounterexampleStore:
+    """
+    This class keeps a persistent, per-exact-circuit record of the input samples that breached the ET in past checks,
+    so that later approximations of the same exact circuit can be tested against them first.
+
+    Hit counts decay with age: an entry's weight halves every `half_life` seconds since its last hit, and entries
+    whose weight falls below `min_hits` are forgotten when the store is loaded.
+
+    Several checks of the same exact circuit may run at once: every update re-reads the file under an exclusive
+    lock on `<circuit_key>.json.lock` and applies its hits to the entries found on disk.
+    """
+    def __init__(self, store_dir: str, circuit_key: str, max_entries: int = 1024,
+                 half_life: float = 30 * 24 * 3600.0, min_hits: float = 0.25) -> None:
+        """
+        Args:
+            store_dir (str): Directory holding one JSON file per exact circuit.
+            circuit_key (str): Name of the exact circuit and of the input order its samples are encoded in.
+            max_entries (int): Maximum number of samples kept on disk; the lightest ones are dropped first.
+            half_life (float): Seconds after which the weight of an entry that was not hit again halves.
+            min_hits (float): Entries whose decayed weight is lower than this are removed.
+        """
+        self.store_dir = store_dir
+        self.circuit_key = circuit_key
+        self.max_entries = max_entries
+        self.half_life = half_life
+        self.min_hits = min_hits
+        self.path = os.path.join(store_dir, f'{circuit_key}.json')
+        # example: {5: {'hits': 3.0, 'last_hit': 1729350000.0}}, hits as of last_hit
+        self.entries: Dict[int, Dict[str, float]] = {}
+        self.load()
+
+    def load(self):
+        """Loads the entries of this circuit from disk, if any, and forgets the ones that decayed away."""
+        if not os.path.exists(self.path):
+            self.entries = {}
+            return
+        try:
+            with open(self.path, 'r') as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            print(Fore.YELLOW + f'[W]: ignoring unreadable counterexample file {self.path}')
+            return
+        self.entries = {int(sample): entry for sample, entry in raw.items()}
+        self.decay()
+
+    def save(self):
+        """Writes the entries to disk atomically, keeping at most `max_entries` of them."""
+        with self._locked():
+            self._write()
+
+    def _write(self):
+        """Replaces the file with the entries in memory; the caller holds the lock."""
+        kept = self._ranked()[:self.max_entries]
+        self.entries = dict(kept)
+        fh, tmp_path = mkstemp(dir=self.store_dir, suffix='.json')
+        with os.fdopen(fh, 'w') as f:
+            json.dump({str(sample): entry for sample, entry in kept}, f)
+        os.replace(tmp_path, self.path)
+
+    def weight(self, sample: int, now: Optional[float] = None) -> float:
+        """Returns the hit count of a sample, decayed by the time elapsed since its last hit."""
+        entry = self.entries[sample]
+        now = time.time() if now is None else now
+        return entry['hits'] * 0.5 ** (max(now - entry['last_hit'], 0.0) / self.half_life)
+
+    def top(self, count: int) -> List[int]:
+        """Returns the `count` samples with the highest decayed hit counts, the most recent first on ties."""
+        return [sample for sample, _ in self._ranked()[:count]]
+
+    def record(self, samples: Iterable[int]):
+        """
+        Increments the decayed hit count of each breaching sample and persists the store. The entries are
+        reloaded first, so that the breaches recorded meanwhile by concurrent checks are kept.
+        """
+        samples = list(dict.fromkeys(samples))
+        if not samples:
+            return
+        with self._locked():
+            self.load()
+            now = time.time()
+            for sample in samples:
+                hits = self.weight(sample, now) if sample in self.entries else 0.0
+                self.entries[sample] = {'hits': hits + 1, 'last_hit': now}
+            self._write()
+
+    @contextmanager
+    def _locked(self):
+        """Holds an exclusive lock on the store of this circuit, shared with other processes."""
+        os.makedirs(self.store_dir, exist_ok=True)
+        with open(f'{self.path}.lock', 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def decay(self) -> int:
+        """
+        Forgets the entries whose decayed hit count fell below `min_hits`.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        now = time.time()
+        expired = [sample for sample in self.entries if self.weight(sample, now) < self.min_hits]
+        for sample in expired:
+            del self.entries[sample]
+        return len(expired)
+
+    def _ranked(self) -> List[Tuple[int, Dict[str, float]]]:
+        """Returns the entries sorted by decayed hit count, then by recency, heaviest first."""
+        now = time.time()
+        return sorted(self.entries.items(), key=lambda item: (self.weight(item[0], now), item[1]['last_hit']),
+                      reverse=True)
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,482 @@
+import re
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+import colorama
+from colorama import Fore, Style
+colorama.init(autoreset=True)
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<num>\d*\s*'[bBoOdDhH]\s*[0-9a-fA-F_]+|\d[\d_]*)
+  | (?P<ident>[A-Za-z_][\w$]*)
+  | (?P<op><<|>>|<=|>=|==|!=|&&|\|\||[-+*<>!~&|^?:()\[\]{},])
+  | (?P<space>\s+)
+""", re.VERBOSE)
+
+# binary operators from the lowest to the highest precedence
+PRECEDENCE = [['||'], ['&&'], ['|'], ['^'], ['&'], ['==', '!='], ['<', '<=', '>', '>='], ['<<', '>>'], ['+', '-'], ['*']]
+ARITHMETIC_OPS = {'+', '-', '*', '&', '|', '^'}
+COMPARISON_OPS = {'<', '<=', '>', '>=', '==', '!='}
+LOGICAL_OPS = {'&&', '||'}
+SHIFT_OPS = {'<<', '>>'}
+BASES = {'b': 2, 'o': 8, 'd': 10, 'h': 16}
+# behavioral modules have a handful of assignments; gate-level netlists are left to iverilog, which simulates them
+# faster than Python evaluates them node by node
+MAX_ASSIGNMENTS = 256
+
+
+class UnsupportedConstruct(Exception):
+    """Raised when the RTL uses a construct outside the subset the golden model understands."""
+
+
+class GoldenModel:
+    """
+    This class evaluates a behavioral module made of continuous assignments (vectors, + - *, comparisons,
+    bitwise and logical operators, shifts, the ternary operator, concatenations, bit and part selects) directly
+    in Python, following the Verilog rules for unsigned expression widths.
+    """
+    def __init__(self, name: str, inputs: List[Tuple[str, int]], outputs: List[Tuple[str, int]],
+                 widths: Dict[str, Tuple[int, int]], assignments: List[Tuple[str, Optional[Tuple[int, int]], Tuple]]) -> None:
+        """
+        Use `GoldenModel.from_file` or `GoldenModel.from_string` instead.
+
+        Args:
+            name (str): Module name.
+            inputs (List[Tuple[str, int]]): Input ports and their widths, in port-list order.
+            outputs (List[Tuple[str, int]]): Output ports and their widths, in port-list order.
+            widths (Dict[str, Tuple[int, int]]): (msb, lsb) of every declared signal.
+            assignments (List): (target, (msb, lsb) or None, expression tree), in evaluation order.
+        """
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.widths = widths
+        self.input_count = sum(width for _, width in inputs)
+        self.output_count = sum(width for _, width in outputs)
+        self._program = [(target, select, self._compile(tree, self._assignment_width(target, select, tree)))
+                         for target, select, tree in assignments]
+
+    # ====================== PUBLIC INTERFACE ======================
+    @classmethod
+    def from_file(cls, path: str) -> Optional['GoldenModel']:
+        """Parses a Verilog file; returns None (after a warning) if it uses unsupported constructs."""
+        with open(path, 'r') as f:
+            verilog_str = f.read()
+        try:
+            return cls.from_string(verilog_str)
+        except UnsupportedConstruct as e:
+            print(Fore.YELLOW + f'[W]: no golden model for {path}: {e}')
+            return None
+
+    @classmethod
+    def from_string(cls, verilog_str: str) -> 'GoldenModel':
+        """
+        Parses a Verilog module.
+
+        Raises:
+            UnsupportedConstruct: If the module uses constructs outside the supported subset.
+        """
+        verilog_str = re.sub(r'/\*.*?\*/', '', verilog_str, flags=re.DOTALL)
+        verilog_str = re.sub(r'//[^\n]*', '', verilog_str)
+        if len(re.findall(r'\bmodule\b', verilog_str)) != 1:
+            raise UnsupportedConstruct('expected exactly one module')
+
+        header = re.search(r'\bmodule\s+([A-Za-z_][\w$]*)\s*\((.*?)\)\s*;', verilog_str, flags=re.DOTALL)
+        if not header:
+            raise UnsupportedConstruct('invalid module declaration')
+        name = header.group(1)
+        body = verilog_str[header.end():]
+        body = re.sub(r'\bendmodule\b', '', body)
+
+        port_list: List[str] = []
+        directions: Dict[str, str] = {}
+        widths: Dict[str, Tuple[int, int]] = {}
+        # ANSI headers carry their declarations
+        if re.search(r'\b(input|output)\b', header.group(2)):
+            direction, vector_range = None, None
+            for item in header.group(2).split(','):
+                match = re.fullmatch(r'\s*(?:(input|output)\s+(?:wire\s+)?(\[[^\]]*\])?)?\s*([A-Za-z_][\w$]*)\s*', item)
+                if not match or (match.group(1) is None and direction is None):
+                    raise UnsupportedConstruct(f'unsupported port declaration "{item.strip()}"')
+                if match.group(1):
+                    direction, vector_range = match.group(1), match.group(2)
+                port_list.append(match.group(3))
+                directions[match.group(3)] = direction
+                widths[match.group(3)] = cls._parse_range(vector_range)
+        else:
+            port_list = [port.strip() for port in header.group(2).split(',') if port.strip()]
+
+        assignments = []
+        for statement in body.split(';'):
+            statement = statement.strip()
+            if not statement:
+                continue
+            declaration = re.fullmatch(r'(input|output|wire)\s+(?:wire\s+)?(\[[^\]]*\])?\s*(.+)', statement, flags=re.DOTALL)
+            if declaration:
+                kind, vector_range, names = declaration.groups()
+                for signal in (n.strip() for n in names.split(',')):
+                    if not re.fullmatch(r'[A-Za-z_][\w$]*', signal):
+                        raise UnsupportedConstruct(f'unsupported declaration "{statement}"')
+                    widths[signal] = cls._parse_range(vector_range)
+                    if kind != 'wire':
+                        directions[signal] = kind
+                continue
+            assignment = re.fullmatch(r'assign\s+(.+?)\s*=\s*(.+)', statement, flags=re.DOTALL)
+            if not assignment:
+                raise UnsupportedConstruct(f'unsupported statement "{statement[:40]}"')
+            target, select = cls._parse_target(assignment.group(1), widths)
+            assignments.append((target, select, _ExpressionParser(assignment.group(2), widths).parse()))
+            if len(assignments) > MAX_ASSIGNMENTS:
+                raise UnsupportedConstruct(f'more than {MAX_ASSIGNMENTS} assignments, netlists are simulated')
+
+        for port in port_list:
+            if port not in directions or port not in widths:
+                raise UnsupportedConstruct(f'port {port} is not declared as input or output')
+        inputs = [(p, cls._width(widths[p])) for p in port_list if directions[p] == 'input']
+        outputs = [(p, cls._width(widths[p])) for p in port_list if directions[p] == 'output']
+        if port_list != [p for p, _ in inputs] + [p for p, _ in outputs]:
+            raise UnsupportedConstruct('inputs must precede outputs in the port list')
+        assigned = {target for target, _, _ in assignments}
+        for port, _ in outputs:
+            if port not in assigned:
+                raise UnsupportedConstruct(f'output {port} is never assigned')
+        cls._check_drivers(assignments, widths)
+        return cls(name, inputs, outputs, widths, cls._schedule(assignments, {p for p, _ in inputs}))
+
+    def evaluate(self, input_values: Dict[str, int]) -> Dict[str, int]:
+        """
+        Evaluates the module for one input pattern.
+
+        Args:
+            input_values (Dict[str, int]): Value of every input port.
+
+        Returns:
+            Dict[str, int]: Value of every output port.
+        """
+        env = {name: input_values[name] & ((1 << width) - 1) for name, width in self.inputs}
+        for target, select, function in self._program:
+            if select is None:
+                env[target] = function(env) & ((1 << self._width(self.widths[target])) - 1)
+            else:
+                msb, lsb = select
+                offset, width = lsb - self.widths[target][1], msb - lsb + 1
+                mask = ((1 << width) - 1) << offset
+                env[target] = (env.get(target, 0) & ~mask) | ((function(env) << offset) & mask)
+        return {name: env.get(name, 0) for name, _ in self.outputs}
+
+    def evaluate_word(self, sample: int) -> int:
+        """
+        Evaluates the module on a packed input word and returns the packed output word. Ports are packed
+        in port-list order, each one LSB first, as `splitnets -ports` numbers them after synthesis.
+        """
+        input_values = {}
+        for name, width in self.inputs:
+            input_values[name] = sample & ((1 << width) - 1)
+            sample >>= width
+        output_values = self.evaluate(input_values)
+        word, offset = 0, 0
+        for name, width in self.outputs:
+            word |= output_values[name] << offset
+            offset += width
+        return word
+
+    # ====================== PARSING HELPERS ======================
+    @staticmethod
+    def _parse_range(vector_range: Optional[str]) -> Tuple[int, int]:
+        """Parses `[msb:lsb]` into (msb, lsb); scalars are (0, 0)."""
+        if not vector_range:
+            return 0, 0
+        match = re.fullmatch(r'\[\s*(\d+)\s*:\s*(\d+)\s*\]', vector_range.strip())
+        if not match or int(match.group(1)) < int(match.group(2)):
+            raise UnsupportedConstruct(f'unsupported range {vector_range}')
+        return int(match.group(1)), int(match.group(2))
+
+    @staticmethod
+    def _width(bounds: Tuple[int, int]) -> int:
+        return bounds[0] - bounds[1] + 1
+
+    @classmethod
+    def _parse_target(cls, target: str, widths: Dict[str, Tuple[int, int]]) -> Tuple[str, Optional[Tuple[int, int]]]:
+        """Parses the left-hand side of an assignment: `name`, `name[i]` or `name[m:l]`."""
+        match = re.fullmatch(r'([A-Za-z_][\w$]*)\s*(?:\[\s*(\d+)\s*(?::\s*(\d+)\s*)?\])?', target.strip())
+        if not match or match.group(1) not in widths:
+            raise UnsupportedConstruct(f'unsupported assignment target "{target}"')
+        if match.group(2) is None:
+            return match.group(1), None
+        msb = int(match.group(2))
+        lsb = int(match.group(3)) if match.group(3) is not None else msb
+        declared = widths[match.group(1)]
+        if not declared[1] <= lsb <= msb <= declared[0]:
+            raise UnsupportedConstruct(f'select out of range in "{target}"')
+        return match.group(1), (msb, lsb)
+
+    @staticmethod
+    def _check_drivers(assignments: List, widths: Dict[str, Tuple[int, int]]):
+        """Rejects bits driven by more than one assignment, which Verilog resolves to `x`."""
+        driven: Dict[str, set] = {}
+        for target, select, _ in assignments:
+            msb, lsb = select if select else widths[target]
+            bits = set(range(lsb, msb + 1))
+            if driven.setdefault(target, set()) & bits:
+                raise UnsupportedConstruct(f'{target} has bits driven by more than one assignment')
+            driven[target] |= bits
+
+    @staticmethod
+    def _schedule(assignments: List, inputs: set) -> List:
+        """Orders assignments so that every signal is fully assigned before it is read."""
+        reads = [_ExpressionParser.identifiers(tree) for _, _, tree in assignments]
+        drivers: Dict[str, List[int]] = {}
+        for index, (target, _, _) in enumerate(assignments):
+            if target in inputs:
+                raise UnsupportedConstruct(f'assignment to input {target}')
+            drivers.setdefault(target, []).append(index)
+        for identifiers in reads:
+            undriven = identifiers - inputs - drivers.keys()
+            if undriven:
+                raise UnsupportedConstruct(f'undriven signal {sorted(undriven)[0]}')
+
+        # Kahn's algorithm: an assignment is ready once every assignment to the signals it reads is scheduled
+        readers: Dict[int, List[int]] = {index: [] for index in range(len(assignments))}
+        waiting = [0] * len(assignments)
+        for index, identifiers in enumerate(reads):
+            for signal in identifiers - inputs:
+                for driver in drivers[signal]:
+                    readers[driver].append(index)
+                    waiting[index] += 1
+        ready = deque(index for index, count in enumerate(waiting) if count == 0)
+        ordered = []
+        while ready:
+            index = ready.popleft()
+            ordered.append(assignments[index])
+            for reader in readers[index]:
+                waiting[reader] -= 1
+                if waiting[reader] == 0:
+                    ready.append(reader)
+        if len(ordered) != len(assignments):
+            raise UnsupportedConstruct('combinational loop between assignments')
+        return ordered
+
+    # ====================== EVALUATION ======================
+    def _assignment_width(self, target: str, select: Optional[Tuple[int, int]], tree: Tuple) -> int:
+        """The context width of an assignment: the larger of its target and its right-hand side."""
+        target_width = self._width(select if select else self.widths[target])
+        return max(target_width, self._self_width(tree))
+
+    def _self_width(self, node: Tuple) -> int:
+        """Returns the self-determined width of an expression."""
+        kind = node[0]
+        if kind == 'num':
+            return node[2]
+        if kind == 'id':
+            if node[1] not in self.widths:
+                raise UnsupportedConstruct(f'undeclared signal {node[1]}')
+            return self._width(self.widths[node[1]])
+        if kind == 'sel':
+            return node[2] - node[3] + 1
+        if kind == 'cat':
+            return sum(self._self_width(item) for item in node[1])
+        if kind == 'un':
+            return 1 if node[1] == '!' else self._self_width(node[2])
+        if kind == 'bin':
+            if node[1] in COMPARISON_OPS or node[1] in LOGICAL_OPS:
+                return 1
+            if node[1] in SHIFT_OPS:
+                return self._self_width(node[2])
+            return max(self._self_width(node[2]), self._self_width(node[3]))
+        # ternary
+        return max(self._self_width(node[2]), self._self_width(node[3]))
+
+    def _compile(self, node: Tuple, width: int) -> Callable[[Dict[str, int]], int]:
+        """
+        Compiles an expression evaluated in a context of `width` bits into a function of the signal values.
+        Context-determined operands are evaluated at the context width, self-determined ones at their own.
+        """
+        mask = (1 << width) - 1
+        kind = node[0]
+        if kind == 'num':
+            value = node[1] & mask
+            return lambda env: value
+        if kind == 'id':
+            name = node[1]
+            return lambda env: env[name]
+        if kind == 'sel':
+            name, msb, lsb = node[1], node[2], node[3]
+            if name not in self.widths or not self.widths[name][1] <= lsb <= msb <= self.widths[name][0]:
+                raise UnsupportedConstruct(f'select out of range on {name}')
+            offset, select_mask = lsb - self.widths[name][1], (1 << (msb - lsb + 1)) - 1
+            return lambda env: (env[name] >> offset) & select_mask
+        if kind == 'cat':
+            parts = [(self._compile(item, self._self_width(item)), self._self_width(item)) for item in node[1]]
+
+            def concatenate(env):
+                value = 0
+                for function, part_width in parts:
+                    value = (value << part_width) | function(env)
+                return value
+            return concatenate
+        if kind == 'un':
+            op = node[1]
+            if op == '!':
+                operand = self._compile(node[2], self._self_width(node[2]))
+                return lambda env: int(operand(env) == 0)
+            operand = self._compile(node[2], width)
+            if op == '~':
+                return lambda env: ~operand(env) & mask
+            if op == '-':
+                return lambda env: -operand(env) & mask
+            return operand
+        if kind == 'bin':
+            op = node[1]
+            if op in COMPARISON_OPS:
+                operand_width = max(self._self_width(node[2]), self._self_width(node[3]))
+                left, right = self._compile(node[2], operand_width), self._compile(node[3], operand_width)
+                compare = {'<': int.__lt__, '<=': int.__le__, '>': int.__gt__, '>=': int.__ge__,
+                           '==': int.__eq__, '!=': int.__ne__}[op]
+                return lambda env: int(compare(left(env), right(env)))
+            if op in LOGICAL_OPS:
+                left = self._compile(node[2], self._self_width(node[2]))
+                right = self._compile(node[3], self._self_width(node[3]))
+                if op == '&&':
+                    return lambda env: int(bool(left(env)) and bool(right(env)))
+                return lambda env: int(bool(left(env)) or bool(right(env)))
+            if op in SHIFT_OPS:
+                left, right = self._compile(node[2], width), self._compile(node[3], self._self_width(node[3]))
+                if op == '<<':
+                    return lambda env: (left(env) << right(env)) & mask
+                return lambda env: left(env) >> right(env)
+            left, right = self._compile(node[2], width), self._compile(node[3], width)
+            arithmetic = {'+': int.__add__, '-': int.__sub__, '*': int.__mul__,
+                          '&': int.__and__, '|': int.__or__, '^': int.__xor__}[op]
+            return lambda env: arithmetic(left(env), right(env)) & mask
+        # ternary
+        condition = self._compile(node[1], self._self_width(node[1]))
+        if_true, if_false = self._compile(node[2], width), self._compile(node[3], width)
+        return lambda env: if_true(env) if condition(env) else if_false(env)
+
+
+class _ExpressionParser:
+    """Precedence-climbing parser for the right-hand side of a continuous assignment."""
+    def __init__(self, text: str, widths: Dict[str, Tuple[int, int]]) -> None:
+        self.tokens = self._tokenize(text)
+        self.position = 0
+        self.widths = widths
+
+    @staticmethod
+    def identifiers(node: Tuple) -> set:
+        """Returns the names of all signals read by an expression tree."""
+        if node[0] in ('id', 'sel'):
+            return {node[1]}
+        if node[0] == 'num':
+            return set()
+        if node[0] == 'cat':
+            children = node[1]
+        elif node[0] == 'un':
+            children = [node[2]]
+        elif node[0] == 'bin':
+            children = [node[2], node[3]]
+        else:
+            children = [node[1], node[2], node[3]]
+        names = set()
+        for child in children:
+            names |= _ExpressionParser.identifiers(child)
+        return names
+
+    def parse(self) -> Tuple:
+        node = self._ternary()
+        if self.position != len(self.tokens):
+            raise UnsupportedConstruct(f'unexpected token "{self.tokens[self.position][1]}"')
+        return node
+
+    def _tokenize(self, text: str) -> List[Tuple[str, str]]:
+        tokens, position = [], 0
+        while position < len(text):
+            match = TOKEN_PATTERN.match(text, position)
+            if not match:
+                raise UnsupportedConstruct(f'unsupported character "{text[position]}"')
+            position = match.end()
+            if match.lastgroup != 'space':
+                tokens.append((match.lastgroup, match.group(0)))
+        return tokens
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.position][1] if self.position < len(self.tokens) else None
+
+    def _expect(self, value: str):
+        if self._peek() != value:
+            raise UnsupportedConstruct(f'expected "{value}"')
+        self.position += 1
+
+    def _ternary(self) -> Tuple:
+        condition = self._binary(0)
+        if self._peek() != '?':
+            return condition
+        self.position += 1
+        if_true = self._ternary()
+        self._expect(':')
+        return ('cond', condition, if_true, self._ternary())
+
+    def _binary(self, level: int) -> Tuple:
+        if level == len(PRECEDENCE):
+            return self._unary()
+        node = self._binary(level + 1)
+        while self._peek() in PRECEDENCE[level]:
+            op = self._peek()
+            self.position += 1
+            node = ('bin', op, node, self._binary(level + 1))
+        return node
+
+    def _unary(self) -> Tuple:
+        if self._peek() in ('-', '+', '~', '!'):
+            op = self._peek()
+            self.position += 1
+            return ('un', op, self._unary())
+        return self._primary()
+
+    def _primary(self) -> Tuple:
+        if self.position >= len(self.tokens):
+            raise UnsupportedConstruct('unexpected end of expression')
+        kind, value = self.tokens[self.position]
+        self.position += 1
+        if value == '(':
+            node = self._ternary()
+            self._expect(')')
+            return node
+        if value == '{':
+            items = [self._ternary()]
+            while self._peek() == ',':
+                self.position += 1
+                items.append(self._ternary())
+            self._expect('}')
+            return ('cat', items)
+        if kind == 'num':
+            return self._number(value)
+        if kind == 'ident':
+            if self._peek() != '[':
+                return ('id', value)
+            self.position += 1
+            msb = self._constant()
+            lsb = msb
+            if self._peek() == ':':
+                self.position += 1
+                lsb = self._constant()
+            self._expect(']')
+            return ('sel', value, msb, lsb)
+        raise UnsupportedConstruct(f'unexpected token "{value}"')
+
+    def _constant(self) -> int:
+        if self.position >= len(self.tokens) or self.tokens[self.position][0] != 'num':
+            raise UnsupportedConstruct('only constant selects are supported')
+        node = self._number(self.tokens[self.position][1])
+        self.position += 1
+        return node[1]
+
+    def _number(self, text: str) -> Tuple:
+        text = re.sub(r'[\s_]', '', text)
+        if "'" not in text:
+            return ('num', int(text), 32)
+        size, literal = text.split("'")
+        width = int(size) if size else 32
+        try:
+            value = int(literal[1:], BASES[literal[0].lower()])
+        except ValueError:
+            raise UnsupportedConstruct(f'malformed number "{text}"')
+        return ('num', value & ((1 << width) - 1), width)
@@ -0,0 +1,309 @@
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import colorama
+from colorama import Fore, Style
+from .check import Checker
+colorama.init(autoreset=True)
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    exact_path TEXT NOT NULL,
+    approx_path TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    heartbeat REAL,
+    created REAL NOT NULL,
+    finished REAL,
+    error TEXT,
+    passed INTEGER,
+    witness TEXT,
+    message TEXT,
+    UNIQUE (exact_path, approx_path, params)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, heartbeat);
+"""
+
+
+class JobQueue:
+    """
+    This class stores a campaign of (exact, approximate) checks in a SQLite file, so that workers on any machine
+    sharing the file can claim jobs atomically, survive crashes, and resume the campaign where it stopped.
+
+    Atomic claims rely on SQLite file locking, which is unreliable on network filesystems such as NFS; keep the
+    database on a local disk, or on a shared filesystem known to implement POSIX locks correctly.
+    """
+    def __init__(self, db_path: str, stale_after: float = 300.0, max_attempts: int = 3) -> None:
+        """
+        Args:
+            db_path (str): Path to the SQLite database; created if missing.
+            stale_after (float): Seconds without heartbeat after which a running job is claimed again.
+            max_attempts (int): Number of claims after which a job is marked as failed.
+        """
+        # workers may run checks from another directory, so a relative path must not resolve differently later
+        self.db_path = os.path.abspath(db_path)
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        conn = sqlite3.connect(self.db_path, timeout=60)
+        try:
+            conn.executescript(SCHEMA)
+            columns = {column[1]: column[2] for column in conn.execute('PRAGMA table_info(jobs)')}
+            # databases created before results carried the search witness
+            if 'witness' not in columns:
+                conn.execute('ALTER TABLE jobs ADD COLUMN witness TEXT')
+            # databases created before errors were stored as text, which a REAL column rounds or overflows
+            if columns.get('error') == 'REAL':
+                self._migrate_errors(conn)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _migrate_errors(conn: sqlite3.Connection):
+        """Rebuilds the jobs table of an older database with a TEXT `error` column, keeping its rows."""
+        # whole-valued errors were metrics returning an int (wae), so they are restored as integers
+        conn.executescript(f"""
+            BEGIN IMMEDIATE;
+            ALTER TABLE jobs RENAME TO jobs_real;
+            DROP INDEX IF EXISTS jobs_status;
+            {SCHEMA}
+            INSERT INTO jobs (id, exact_path, approx_path, params, status, worker, attempts, heartbeat, created,
+                              finished, error, passed, witness, message)
+                SELECT id, exact_path, approx_path, params, status, worker, attempts, heartbeat, created, finished,
+                       CASE WHEN error = CAST(error AS INTEGER) THEN CAST(error AS INTEGER) ELSE error END,
+                       passed, witness, message
+                FROM jobs_real;
+            DROP TABLE jobs_real;
+            COMMIT;
+        """)
+
+    @contextmanager
+    def _transaction(self, immediate: bool = False):
+        """Yields a connection inside a transaction; `immediate` takes the write lock up front."""
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+            yield conn
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    # ====================== CAMPAIGN ======================
+    def add(self, exact_path: str, approx_path: str, **params: Any) -> bool:
+        """
+        Adds a job; `params` are the keyword arguments of `Checker.Check` (input_order, metric, et, ...).
+
+        Returns:
+            bool: False if the same job is already in the queue.
+        """
+        return self.add_many([(exact_path, approx_path, params)]) == 1
+
+    def add_many(self, jobs: Iterable[Tuple[str, str, Dict[str, Any]]]) -> int:
+        """Adds many jobs in one transaction; returns the number of jobs that were not already queued."""
+        now = time.time()
+        rows = [(os.path.abspath(exact), os.path.abspath(approx), json.dumps(params, sort_keys=True), now)
+                for exact, approx, params in jobs]
+        with self._transaction(immediate=True) as conn:
+            before = conn.total_changes
+            conn.executemany('INSERT OR IGNORE INTO jobs (exact_path, approx_path, params, created) VALUES (?, ?, ?, ?)', rows)
+            return conn.total_changes - before
+
+    # ====================== WORKER SIDE ======================
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claims the oldest pending job, or a running job whose worker stopped sending heartbeats.
+
+        Returns:
+            Optional[Dict[str, Any]]: The job (id, exact_path, approx_path, params, attempts), or None if none is left.
+        """
+        now = time.time()
+        with self._transaction(immediate=True) as conn:
+            conn.execute('UPDATE jobs SET status = ?, message = ? WHERE status = ? AND heartbeat < ? AND attempts >= ?',
+                         (STATUS_FAILED, 'stale after last attempt', STATUS_RUNNING, now - self.stale_after, self.max_attempts))
+            row = conn.execute('SELECT * FROM jobs WHERE status = ? OR (status = ? AND heartbeat < ?) ORDER BY id LIMIT 1',
+                               (STATUS_PENDING, STATUS_RUNNING, now - self.stale_after)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE jobs SET status = ?, worker = ?, heartbeat = ?, attempts = attempts + 1 WHERE id = ?',
+                         (STATUS_RUNNING, worker, now, row['id']))
+        return {'id': row['id'], 'exact_path': row['exact_path'], 'approx_path': row['approx_path'],
+                'params': json.loads(row['params']), 'attempts': row['attempts'] + 1}
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """Refreshes the lease of a running job; returns False if the job is no longer held by `worker`."""
+        with self._transaction(immediate=True) as conn:
+            cursor = conn.execute('UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = ?',
+                                  (time.time(), job_id, worker, STATUS_RUNNING))
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, error: Any, passed: bool, witness: Optional[int] = None) -> bool:
+        """
+        Stores the result of a job. Results are written once: a late duplicate of a job that was claimed
+        again after going stale does not overwrite the first result. The error and the witness of a guided
+        search are stored as text, since they can be wider than a SQLite integer.
+
+        Returns:
+            bool: True if this call stored the result.
+        """
+        with self._transaction(immediate=True) as conn:
+            cursor = conn.execute('UPDATE jobs SET status = ?, worker = ?, finished = ?, error = ?, passed = ?, witness = ?, '
+                                  'message = NULL WHERE id = ? AND status != ?',
+                                  (STATUS_DONE, worker, time.time(), None if error is None else str(error), int(bool(passed)),
+                                   None if witness is None else str(witness), job_id, STATUS_DONE))
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, message: str):
+        """Releases a job after an exception; it is retried until `max_attempts` claims have been made."""
+        with self._transaction(immediate=True) as conn:
+            conn.execute('UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, message = ?, heartbeat = NULL '
+                         'WHERE id = ? AND worker = ? AND status = ?',
+                         (self.max_attempts, STATUS_FAILED, STATUS_PENDING, message, job_id, worker, STATUS_RUNNING))
+
+    def run_worker(self, worker: Optional[str] = None, heartbeat_interval: float = 30.0,
+                   max_jobs: Optional[int] = None, workdir: Optional[str] = None,
+                   poll_interval: Optional[float] = None, counterexample_dir: Optional[str] = None) -> int:
+        """
+        Claims and checks jobs until no job is pending or running (or `max_jobs` jobs are done). While other
+        workers still hold running jobs, the worker keeps polling, so that it retries them if they go stale.
+
+        Args:
+            worker (Optional[str]): Worker identifier, `<hostname>:<pid>` by default.
+            heartbeat_interval (float): Seconds between heartbeats; must be well below `stale_after`.
+            max_jobs (Optional[int]): Stop after this many jobs.
+            workdir (Optional[str]): Directory for the intermediary files of the checks (the `temp_dir` of
+                `Checker`). Workers sharing a machine need distinct ones, since netlists and testbenches are named
+                after their circuits; each worker then synthesizes every exact circuit once.
+            poll_interval (Optional[float]): Seconds between claims while only running jobs are left,
+                a quarter of `stale_after` by default.
+            counterexample_dir (Optional[str]): Counterexample store used by jobs that do not set their own. Give
+                all workers the same directory, so that the ET breaches found by one are tried first by the others.
+
+        Returns:
+            int: The number of jobs this worker processed.
+        """
+        worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+        defaults = {}
+        if workdir:
+            defaults['temp_dir'] = os.path.abspath(workdir)
+        if counterexample_dir:
+            defaults['counterexample_dir'] = os.path.abspath(counterexample_dir)
+
+        poll_interval = poll_interval if poll_interval is not None else self.stale_after / 4
+        processed = 0
+        while max_jobs is None or processed < max_jobs:
+            job = self.claim(worker)
+            if job is None:
+                counts = self.progress()
+                if counts[STATUS_PENDING] + counts[STATUS_RUNNING] == 0:
+                    break
+                time.sleep(poll_interval)
+                continue
+            print(Fore.BLUE + f'[I]: {worker} running job {job["id"]} (attempt {job["attempts"]})')
+            stop = threading.Event()
+            beat = threading.Thread(target=self._beat, args=(job['id'], worker, heartbeat_interval, stop), daemon=True)
+            beat.start()
+            try:
+                result = Checker.Check(job['exact_path'], job['approx_path'], **{**defaults, **job['params']})
+                witness = result[2] if len(result) > 2 else None
+                self.complete(job['id'], worker, result[0], result[1], witness)
+            except Exception as e:
+                print(Fore.RED + f'[E]: job {job["id"]} failed: {e!r}')
+                self.fail(job['id'], worker, repr(e))
+            finally:
+                stop.set()
+                beat.join()
+            processed += 1
+        return processed
+
+    def _beat(self, job_id: int, worker: str, interval: float, stop: threading.Event):
+        """Sends heartbeats for a job until `stop` is set."""
+        while not stop.wait(interval):
+            try:
+                self.heartbeat(job_id, worker)
+            except sqlite3.Error as e:
+                print(Fore.YELLOW + f'[W]: heartbeat of job {job_id} failed: {e}')
+
+    # ====================== QUERIES ======================
+    def progress(self) -> Dict[str, int]:
+        """Returns the number of jobs in each status."""
+        with self._transaction() as conn:
+            rows = conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        counts = {STATUS_PENDING: 0, STATUS_RUNNING: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def throughput(self, window: float = 600.0) -> float:
+        """Returns the number of jobs finished per second over the last `window` seconds."""
+        with self._transaction() as conn:
+            done = conn.execute('SELECT COUNT(*) FROM jobs WHERE status = ? AND finished >= ?',
+                                (STATUS_DONE, time.time() - window)).fetchone()[0]
+        return done / window
+
+    def results(self) -> List[Dict[str, Any]]:
+        """Returns the finished jobs with their results, in insertion order."""
+        with self._transaction() as conn:
+            rows = conn.execute('SELECT id, exact_path, approx_path, params, error, passed, witness, worker, finished '
+                                'FROM jobs WHERE status = ? ORDER BY id', (STATUS_DONE,)).fetchall()
+        return [dict(row, params=json.loads(row['params']), passed=bool(row['passed']), error=self._decode(row['error']),
+                     witness=None if row['witness'] is None else int(row['witness'])) for row in rows]
+
+    @staticmethod
+    def _decode(error: Optional[str]) -> Union[None, float, int]:
+        """Converts a stored error back to the int (wae) or float (med, er, nmed) the check returned."""
+        if error is None:
+            return None
+        try:
+            return int(error)
+        except ValueError:
+            return float(error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs or monitors a resumable campaign of checks.')
+    parser.add_argument('db', help='path to the SQLite job database')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    work = subparsers.add_parser('work', help='claim and run jobs until none is pending or running')
+    work.add_argument('--worker', default=None)
+    work.add_argument('--workdir', default=None)
+    work.add_argument('--heartbeat', type=float, default=30.0)
+    work.add_argument('--stale_after', type=float, default=300.0)
+    work.add_argument('--counterexample_dir', default=None, help='counterexample store shared by all workers')
+    status = subparsers.add_parser('status', help='print progress and throughput')
+    status.add_argument('--window', type=float, default=600.0)
+    args = parser.parse_args()
+
+    if args.command == 'work':
+        queue = JobQueue(args.db, stale_after=args.stale_after)
+        processed = queue.run_worker(args.worker, args.heartbeat, workdir=args.workdir,
+                                     counterexample_dir=args.counterexample_dir)
+        print(f'processed {processed} jobs')
+    else:
+        queue = JobQueue(args.db)
+        counts = queue.progress()
+        rate = queue.throughput(args.window)
+        remaining = counts[STATUS_PENDING] + counts[STATUS_RUNNING]
+        eta = f'{remaining / rate:.0f}s' if rate else 'unknown'
+        print(', '.join(f'{status}={count}' for status, count in counts.items()))
+        print(f'throughput = {rate * 3600:.1f} jobs/h, eta = {eta}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+import math
+import random
+import time
+from typing import Callable, Dict, List, Literal, Optional, Tuple, Union
+import colorama
+from colorama import Fore, Style
+colorama.init(autoreset=True)
+
+SEARCH_HILL = 'hill'        # bit-flip hill climbing around the best witness found so far
+SEARCH_ANNEAL = 'anneal'    # simulated annealing over bit-flip neighbourhoods
+SEARCH_GENETIC = 'genetic'  # population with uniform crossover and bit-flip mutation
+
+
+class WorstCaseSearch:
+    """
+    This class searches the input space of an (exact, approximate) pair for the input that maximizes
+    the absolute error. Candidates are evaluated in batches, so every simulator run covers many patterns.
+    """
+    def __init__(self,
+                 input_count: int,
+                 evaluate: Callable[[List[int]], List[int]],
+                 strategy: Literal["hill", "anneal", "genetic"] = SEARCH_ANNEAL,
+                 batch_size: int = 64,
+                 max_evaluations: int = 1024,
+                 time_budget: Optional[float] = None,
+                 target: Optional[Union[float, int]] = None,
+                 seed: Optional[int] = None) -> None:
+        """
+        Args:
+            input_count (int): Number of primary input bits of the circuits.
+            evaluate (Callable): Maps a batch of integer samples to their absolute errors.
+            strategy (str): One of `hill`, `anneal` or `genetic`.
+            batch_size (int): Number of candidates simulated per batch.
+            max_evaluations (int): Maximum number of distinct samples to simulate.
+            time_budget (Optional[float]): Wall-clock budget in seconds, unlimited if None.
+            target (Optional[Union[float, int]]): Stop as soon as an error above this value is found.
+            seed (Optional[int]): Seed of the random generator, for reproducible runs.
+        """
+        if strategy not in (SEARCH_HILL, SEARCH_ANNEAL, SEARCH_GENETIC):
+            raise ValueError(Fore.RED + f"[E]: unknown search strategy {strategy}")
+        if max_evaluations < 1:
+            raise ValueError(Fore.RED + f"[E]: the search budget must allow at least one evaluation, got {max_evaluations}")
+        self.input_count = input_count
+        self.evaluate = evaluate
+        self.strategy = strategy
+        self.batch_size = max(batch_size, 2)
+        self.max_evaluations = max_evaluations
+        self.time_budget = time_budget
+        self.target = target
+        self.rng = random.Random(seed)
+
+        self.mask = (1 << input_count) - 1
+        self.cache: Dict[int, int] = {}
+        self.best_error = -1
+        self.best_sample: Optional[int] = None
+        self.start_time = None
+
+    # ====================== PUBLIC INTERFACE ======================
+    def run(self) -> Tuple[int, Optional[int]]:
+        """
+        Runs the search until the evaluation or time budget is exhausted, or the target is breached.
+
+        Returns:
+            Tuple[int, Optional[int]]: The largest error found and the input sample (witness) producing it.
+        """
+        print(Fore.BLUE + f'[I]: searching worst-case error with strategy {self.strategy}...')
+        self.start_time = time.time()
+
+        population = self._evaluate_batch(self.carry_chain_seeds() + self._random_samples(self.batch_size))
+        if self.strategy == SEARCH_HILL:
+            self._hill_climb(population)
+        elif self.strategy == SEARCH_ANNEAL:
+            self._anneal(population)
+        else:
+            self._genetic(population)
+
+        print(Fore.BLUE + f'[I]: search finished after {len(self.cache)} evaluations, '
+                          f'worst error = {self.best_error} at input {self.best_sample}')
+        return self.best_error, self.best_sample
+
+    def carry_chain_seeds(self) -> List[int]:
+        """
+        Builds seed patterns that exercise long carry/borrow chains, assuming the input word holds
+        two equally sized operands (as `reorder_string` does).
+
+        Returns:
+            List[int]: Distinct seed samples within the input space.
+        """
+        n = self.input_count
+        half = max(n // 2, 1)
+        ones = (1 << half) - 1
+        seeds = [0, self.mask, self._repeat('01'), self._repeat('10')]
+        for k in range(1, half + 1):
+            run = (1 << k) - 1
+            seeds.append(run | (1 << half))               # a = 0..01..1, b = 1
+            seeds.append(1 | (run << half))               # a = 1, b = 0..01..1
+            seeds.append(run | (run << half))             # a = b = 0..01..1
+        seeds.append(ones)
+        seeds.append(ones << half)
+        return list(dict.fromkeys(s & self.mask for s in seeds))
+
+    # ====================== STRATEGIES ======================
+    def _hill_climb(self, population: List[Tuple[int, int]]):
+        """Greedy bit-flip ascent from the best witness, restarting from random samples on stagnation."""
+        current_error, current = max(population)
+        while not self._exhausted():
+            children = self._evaluate_batch([self._flip(current, self.rng.randint(1, 2)) for _ in range(self.batch_size)])
+            if not children:
+                current_error, current = -1, self._random_samples(1)[0]
+                continue
+            child_error, child = max(children)
+            if child_error > current_error:
+                current_error, current = child_error, child
+            elif self.rng.random() < 0.25:
+                current_error, current = -1, self._random_samples(1)[0]
+
+    def _anneal(self, population: List[Tuple[int, int]]):
+        """Simulated annealing; the temperature decays linearly with the consumed budget."""
+        current_error, current = max(population)
+        initial_temperature = max(current_error, 1)
+        while not self._exhausted():
+            children = self._evaluate_batch([self._flip(current, self.rng.randint(1, 3)) for _ in range(self.batch_size)])
+            if not children:
+                current = self._random_samples(1)[0]
+                continue
+            child_error, child = max(children)
+            temperature = initial_temperature * max(1.0 - self._progress(), 1e-3)
+            delta = child_error - current_error
+            if delta >= 0 or self.rng.random() < math.exp(delta / temperature):
+                current_error, current = child_error, child
+
+    def _genetic(self, population: List[Tuple[int, int]]):
+        """Steady-state genetic search with tournament selection, uniform crossover and mutation."""
+        population = sorted(population, reverse=True)[:self.batch_size]
+        while not self._exhausted():
+            children = []
+            for _ in range(self.batch_size):
+                parent1 = self._tournament(population)
+                parent2 = self._tournament(population)
+                crossover = self.rng.getrandbits(self.input_count)
+                child = (parent1 & crossover) | (parent2 & ~crossover & self.mask)
+                children.append(self._flip(child, self.rng.randint(0, 2)))
+            offspring = self._evaluate_batch(children)
+            if not offspring:
+                offspring = self._evaluate_batch(self._random_samples(self.batch_size))
+            population = sorted(population + offspring, reverse=True)[:self.batch_size]
+
+    # ====================== HELPERS ======================
+    def _evaluate_batch(self, samples: List[int]) -> List[Tuple[int, int]]:
+        """
+        Simulates the samples that have not been seen before, within the remaining budget.
+
+        Returns:
+            List[Tuple[int, int]]: (error, sample) pairs of the newly simulated samples.
+        """
+        fresh = [s for s in dict.fromkeys(samples) if s not in self.cache]
+        fresh = fresh[:max(self.max_evaluations - len(self.cache), 0)]
+        if not fresh:
+            return []
+        errors = self.evaluate(fresh)
+        for sample, error in zip(fresh, errors):
+            self.cache[sample] = error
+            if error > self.best_error:
+                self.best_error, self.best_sample = error, sample
+        return [(error, sample) for sample, error in zip(fresh, errors)]
+
+    def _exhausted(self) -> bool:
+        """Returns True once the budget is consumed, the target is breached or the space is exhausted."""
+        if self.target is not None and self.best_error > self.target:
+            return True
+        if len(self.cache) >= min(self.max_evaluations, self.mask + 1):
+            return True
+        return self.time_budget is not None and time.time() - self.start_time >= self.time_budget
+
+    def _progress(self) -> float:
+        """Returns the fraction of the evaluation or time budget consumed so far."""
+        progress = len(self.cache) / self.max_evaluations
+        if self.time_budget:
+            progress = max(progress, (time.time() - self.start_time) / self.time_budget)
+        return min(progress, 1.0)
+
+    def _flip(self, sample: int, bit_count: int) -> int:
+        """Flips `bit_count` random bits of a sample."""
+        for _ in range(bit_count):
+            sample ^= 1 << self.rng.randrange(self.input_count)
+        return sample
+
+    def _tournament(self, population: List[Tuple[int, int]], size: int = 3) -> int:
+        """Returns the fittest of `size` randomly drawn individuals."""
+        return max(self.rng.choice(population) for _ in range(size))[1]
+
+    def _random_samples(self, count: int) -> List[int]:
+        """Draws uniformly random samples from the input space."""
+        return [self.rng.getrandbits(self.input_count) for _ in range(count)]
+
+    def _repeat(self, pattern: str) -> int:
+        """Repeats a bit pattern over the whole input word."""
+        return int((pattern * self.input_count)[:self.input_count], 2)
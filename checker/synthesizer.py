@@ -1,9 +1,52 @@
 import tempfile
 import subprocess
 import os
-from typing import Tuple, Optional, Any
+import json
+import hashlib
+from typing import Tuple, Optional, Any, Literal
 from .verilog import *
 
+PROFILE_FULL = 'full'  # NAND-mapped netlist through ABC
+PROFILE_FAST = 'fast'  # flattened RTL with bit-blasted ports, for simulation only
+PROFILE_AIG = 'aig'    # AND-inverter graph, for the structural and formal engines
+
+# every profile ends with `splitnets -ports` so that `_rename_variables` sees one port per bit
+SYNTHESIS_PROFILES = {
+    PROFILE_FULL: """
+                read_verilog {input_path};
+                synth -flatten;
+                opt;
+                opt_clean -purge;
+                abc -g NAND;
+                opt;
+                opt_clean -purge;
+                splitnets -ports;
+                opt;
+                opt_clean -purge;
+                write_verilog -noattr {output_path};
+                """,
+    PROFILE_FAST: """
+                read_verilog {input_path};
+                hierarchy -auto-top;
+                proc;
+                flatten;
+                opt_clean -purge;
+                splitnets -ports;
+                opt_clean -purge;
+                write_verilog -noattr {output_path};
+                """,
+    PROFILE_AIG: """
+                read_verilog {input_path};
+                synth -flatten -noabc;
+                aigmap;
+                opt;
+                opt_clean -purge;
+                splitnets -ports;
+                opt_clean -purge;
+                write_verilog -noattr {output_path};
+                """,
+}
+
 class Synthesizer:
     def __init__(self, verilog_processor: VerilogProcessor):
         """
@@ -11,12 +54,21 @@ class Synthesizer:
         and handling necessary preprocessing steps through an instance of VerilogProcessor.
         """
         self.verilog_processor = verilog_processor  # Instance of Verilog class
-    def synthesize(self, input_path: str, output_path: str) -> Tuple[str, Any, Any, Any, Any]:
+    def synthesize(self, input_path: str, output_path: str,
+                   profile: Literal["full", "fast", "aig"] = PROFILE_FULL,
+                   reuse: bool = False) -> Tuple[str, Any, Any, Any, Any]:
         """
         Synthesizes a Verilog file using Yosys, creating a temporary output file.
 
+        Every synthesized netlist is recorded in a `<output_path>.json` sidecar, keyed by the content of the source,
+        the Yosys script and `RENAMER_VERSION`. With `reuse`, a netlist whose sidecar matches is returned as it is,
+        without running Yosys.
+
         Args:
             input_path (str): The path to the input Verilog file to be synthesized.
+            output_path (str): The path of the synthesized Verilog file.
+            profile (str): The synthesis script to run, one of `SYNTHESIS_PROFILES`.
+            reuse (bool): Reuse the netlist of a previous synthesis of the same source and profile.
 
         Returns:
             Tuple[str, Tuple]: The path to the synthesized output file and the renaming details.
@@ -24,25 +76,20 @@ class Synthesizer:
         Raises:
             Exception: If Yosys encounters an error during synthesis.
         """
-        print(Fore.BLUE + f'[I]: synthesizing {input_path}')
+        if profile not in SYNTHESIS_PROFILES:
+            raise ValueError(Fore.RED + f"[E]: unknown synthesis profile {profile}")
         self.verilog_processor._fix_module_name(input_path)
+        yosys_command = SYNTHESIS_PROFILES[profile].format(input_path=input_path, output_path=output_path)
+        key = self._source_key(input_path, yosys_command)
+        if reuse:
+            details = self._load_details(output_path, key)
+            if details is not None:
+                print(Fore.BLUE + f'[I]: reusing {output_path} for {input_path} ({profile})')
+                return (output_path, *details)
+        print(Fore.BLUE + f'[I]: synthesizing {input_path} ({profile})')
 
         # Create a temporary file to store the synthesized output
         # temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".v")
-        # Yosys synthesis command
-        yosys_command = f"""
-                read_verilog {input_path};
-                synth -flatten;
-                opt;
-                opt_clean -purge;
-                abc -g NAND;
-                opt;
-                opt_clean -purge;
-                splitnets -ports;
-                opt;
-                opt_clean -purge;
-                write_verilog -noattr {output_path};
-                """
 
         # Run Yosys with the synthesis command
         # process = subprocess.run(['yosys', '-p', yosys_command], stderr=subprocess.PIPE, stdout=subprocess.PIPE)
@@ -67,8 +114,40 @@ class Synthesizer:
 
         # Rename variables in the synthesized output
         module_name, port_list, new_input_dict, output_dict = self.verilog_processor._rename_variables(output_path, output_path)
+        self._save_details(output_path, key, (module_name, port_list, new_input_dict, output_dict))
         return output_path, module_name, port_list, new_input_dict, output_dict
 
+    def _source_key(self, input_path: str, yosys_command: str) -> str:
+        """Returns the digest of everything a renamed netlist is derived from: source, Yosys script and renamer."""
+        with open(input_path, 'rb') as f:
+            source = f.read()
+        return hashlib.sha1(b'\x00'.join([source, yosys_command.encode(), str(RENAMER_VERSION).encode()])).hexdigest()
+
+    def _save_details(self, output_path: str, key: str, details: Tuple[Any, Any, Any, Any]):
+        """Records the source key and the renaming details of a netlist next to it."""
+        module_name, port_list, input_dict, output_dict = details
+        with open(f'{output_path}.json', 'w') as f:
+            json.dump({'key': key, 'module_name': module_name, 'port_list': port_list,
+                       'input_dict': input_dict, 'output_dict': output_dict}, f)
+
+    def _load_details(self, output_path: str, key: str) -> Optional[Tuple[Any, Any, Any, Any]]:
+        """
+        Returns the renaming details of a netlist synthesized from the same source and profile, or None if the
+        netlist is missing or out of date.
+        """
+        if not os.path.exists(output_path):
+            return None
+        try:
+            with open(f'{output_path}.json', 'r') as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if recorded.get('key') != key:
+            return None
+        input_dict = {int(port): tuple(label) for port, label in recorded['input_dict'].items()}
+        output_dict = {int(port): tuple(label) for port, label in recorded['output_dict'].items()}
+        return recorded['module_name'], recorded['port_list'], input_dict, output_dict
+
     def cleanup(self, path: str) -> Optional[None]:
         """
         Deletes a specified file, typically used to remove temporary synthesized files.
@@ -7,6 +7,21 @@ from tempfile import mkstemp
 import colorama
 from colorama import Fore, Style
 colorama.init(autoreset=True)
+
+# Leading whitespace is folded into each token to halve the number of matches. Comments and escaped
+# identifiers come first, so that their content is never split into other tokens. A based number is
+# matched whole from its size or its quote, so a scan never resumes inside it and the `h0` of `1'h0` is
+# not taken for a name. Multi-character operators are single tokens, so that `a && b` and `a & &b` stay apart.
+# part of the key of reusable netlists; bump it whenever `_rename_variables` changes the netlists it writes
+RENAMER_VERSION = 2
+
+TOKEN_PATTERN = re.compile(r"""\s*(?:
+    (?P<comment>/\*.*?\*/|//[^\n]*)
+  | (?P<ident>\\\S+|[A-Za-z_][\w$]*)
+  | (?P<number>\d*\s*'[sS]?[bBoOdDhH]\s*[0-9a-fA-FxXzZ_?]+|\d+)
+  | (?P<other>\$[\w$]*|<<<|>>>|===|!==|==|!=|<=|>=|&&|\|\||<<|>>|\*\*|~&|~\||~\^|\^~|.)
+)""", re.VERBOSE | re.DOTALL)
+
 class VerilogProcessor:
     """
         This class provides methods for processing Verilog files, including fixing module names,
@@ -63,6 +78,9 @@ class VerilogProcessor:
         """
         Renames variables within a Verilog file based on a new label mapping.
 
+        The netlist is tokenized once; ports are extracted from the tokens and their occurrences are spliced
+        with the new labels, so the cost is linear in the size of the netlist whatever the number of ports.
+
         Args:
             input_path (str): Path to the original Verilog file.
             output_path (str): Path to save the modified Verilog file.
@@ -74,232 +92,148 @@ class VerilogProcessor:
         with open(f'{input_path}', 'r') as infile:
             verilog_str = infile.read()
 
-        verilog_str_tmp = verilog_str
-
-
-        module_name, port_list = self._extract_module_signature(verilog_str_tmp)
-
-        input_dict, output_dict = self._extract_inputs_outputs( verilog_str, port_list)
-
+        tokens = self._tokenize(verilog_str)
+        module_name, port_list, input_dict, output_dict = self._extract_ports(tokens)
         new_labels = self._create_new_labels(port_list, input_dict, output_dict)
-
-
-        # verilog_str = verilog_str.split('\n')
-        verilog_str = self._relabel_nodes(verilog_str, new_labels)
+        verilog_str = self._relabel_nodes(verilog_str, tokens, new_labels)
 
         with open(f'{output_path}', 'w') as outfile:
             outfile.write(f'{verilog_str}\n')
 
         new_input_dict = {}
-        new_output_dict = {}
-        for inkey in input_dict.keys():
-            invalue = input_dict[inkey]
-            if invalue[0] in new_labels.keys():
-                new_input_dict[inkey] = (new_labels[invalue[0]], invalue[1])
-
-        for outkey in output_dict.keys():
-            outvalue = output_dict[outkey]
-            if outvalue[0] in new_labels.keys():
-                new_output_dict[outkey] = (new_labels[outvalue[0]], outvalue[1])
-        # if re.search('mul_i12_o12_lac0_20241113', input_path):
-        #     exit()
+        for inkey, (name, width) in input_dict.items():
+            if name in new_labels:
+                new_input_dict[inkey] = (new_labels[name], width)
+
         # I'm just returning these because I need them later
         return module_name, port_list, new_input_dict, output_dict
 
-    def _create_new_labels(self, port_list: List, input_dict: Dict, output_dict: Dict):
+    def _tokenize(self, verilog_str: str) -> List[Tuple[str, str, int]]:
         """
-        Creates new labels for variables based on port list and input/output dictionaries.
+        Splits Verilog code into tokens, dropping whitespace.
 
         Args:
-            port_list (List): List of port names.
-            input_dict (Dict): Dictionary of input ports.
-            output_dict (Dict): Dictionary of output ports.
+            verilog_str (str): Verilog code as a single string.
 
         Returns:
-            Dict: A dictionary mapping old variable names to new labels.
+            List[Tuple[str, str, int]]: (kind, text, position) of each token, where kind is one of
+            `comment`, `ident`, `number` or `other`.
         """
-        new_labels: Dict = {}
-        for i_idx in input_dict.keys():
-            i = input_dict[i_idx][0]
-            if i in port_list:
-                p_idx = port_list.index(i)
-                new_labels[i] = f'in{p_idx}'
-
-        for o_idx in output_dict.keys():
-            o = output_dict[o_idx][0]
-            if o in port_list:
-                p_idx = port_list.index(o)
-                new_labels[o] = f'out{p_idx - (len(input_dict))}'
-
-        return new_labels
+        return [(match.lastgroup, match.group(match.lastgroup), match.start(match.lastgroup))
+                for match in TOKEN_PATTERN.finditer(verilog_str)]
 
-    def _relabel_nodes(self, verilog_str: str, new_labels: dict) -> str:
+    def _extract_ports(self, tokens: List[Tuple[str, str, int]]) -> Tuple[str, List[str], Dict, Dict]:
         """
-        Relabels variables in a Verilog string based on new_labels mapping.
+        Extracts the module name, the port list and the input/output declarations in one pass over the tokens.
 
         Args:
-            verilog_str (str): The Verilog code as a single string.
-            new_labels (dict): A dictionary mapping old variable names to new labels.
+            tokens (List[Tuple[str, str, int]]): Tokens of the Verilog code.
 
         Returns:
-            str: The Verilog string with relabeled variables.
+            Tuple[str, List[str], Dict[int, Tuple[str, int]], Dict[int, Tuple[str, int]]]: The module name, the port
+            list, and the input and output dictionaries mapping a port position to its (name, width).
         """
-        # Use a regex pattern to replace all labels
-        def replace_match(match):
-            old_label = match.group(0)
-            return new_labels.get(old_label, old_label)  # Replace if found, else keep original
-
-        # Construct a regex to match any of the keys in new_labels
-        pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, new_labels.keys())) + r')\b')
-
-        # Replace all matches using the pattern
-        relabeled_verilog = pattern.sub(replace_match, verilog_str)
+        # example:
+        # for module circuit(a, b, c, d)
+        # input [1:0] a;
+        # output d;
+        # input_dict = {0: ('a', 2)}, output_dict = {3: ('d', 1)}
+        module_name = None
+        port_list: List[str] = []
+        declarations: List[Tuple[str, List[Tuple[str, str]]]] = []
+        keyword = None  # first token of the current statement
+        statement: List[Tuple[str, str]] = []
+        for kind, text, _ in tokens:
+            if kind == 'comment':
+                continue
+            if keyword is None:
+                if text != 'endmodule':
+                    keyword, statement = text, []
+                continue
+            if text != ';':
+                if keyword in ('module', 'input', 'output'):
+                    statement.append((kind, text))
+                continue
+
+            if keyword == 'module' and module_name is None:
+                if not statement or statement[0][0] != 'ident':
+                    raise ValueError(Fore.RED + "Failed to extract module name. Invalid module declaration.")
+                module_name = statement[0][1]
+                texts = [t for _, t in statement[1:]]
+                if not texts or texts[0] != '(' or texts[-1] != ')':
+                    raise ValueError(Fore.RED + "Failed to extract port list. Invalid module declaration.")
+                port_list = [t for k, t in statement[2:-1] if k == 'ident']
+            elif keyword in ('input', 'output'):
+                declarations.append((keyword, statement))
+            keyword = None
+
+        if module_name is None:
+            raise ValueError(Fore.RED + "Failed to extract module name. Invalid module declaration.")
 
-        return relabeled_verilog
+        port_dict = {p: p_idx for p_idx, p in enumerate(port_list)}
+        input_dict: Dict[int, Tuple[str, int]] = {}
+        output_dict: Dict[int, Tuple[str, int]] = {}
+        for direction, statement in declarations:
+            width = 1
+            texts = [t for _, t in statement]
+            # input [m:l] a, b;
+            if len(texts) >= 5 and texts[0] == '[' and texts[2] == ':' and texts[4] == ']':
+                width = abs(int(texts[1]) - int(texts[3])) + 1
+            target = input_dict if direction == 'input' else output_dict
+            for kind, name in statement:
+                if kind == 'ident' and name in port_dict:
+                    target[port_dict[name]] = (name, width)
+
+        return module_name, port_list, dict(sorted(input_dict.items())), dict(sorted(output_dict.items()))
 
-    # def _relabel_nodes(self, verilog_str: List[str], new_labels: Dict):
-    #     """
-    #     Replaces old variable names with new labels in the Verilog code.
-    #
-    #     Args:
-    #         verilog_str (List[str]): Lines of Verilog code.
-    #         new_labels (Dict): Dictionary mapping old names to new labels.
-    #
-    #     Returns:
-    #         List[str]: Modified Verilog code with relabeled nodes.
-    #     """
-    #     verilog_str_tmp = verilog_str
-    #     print(f'{verilog_str = }')
-    #     for line_idx, line in enumerate(verilog_str):
-    #         for key, value in new_labels.items():
-    #
-    #             escaped_key = re.escape(key)
-    #             if re.search(f'{escaped_key}[,;)\s\n\r]|({escaped_key})$', line):
-    #                 found = re.search(f'({escaped_key})[,;)\s\r\n]|({escaped_key})$', line)
-    #                 middle = found.group(1)
-    #                 end = found.group(2)
-    #
-    #                 s = found.span()[0]
-    #                 if found.group(1):
-    #                     e = s + len(found.group(1))
-    #                     line = f"{line[:s]}{value}{line[e:]}"
-    #                 elif found.group(2):
-    #                     line = f"{line[:s]}{value}"
-    #                 else:
-    #                     print(
-    #                         Fore.RED + f'ERROR! in (__name__): variable{key} does not belong in either of the two groups!' + Style.RESET_ALL)
-    #                 verilog_str_tmp[line_idx] = line
-    #     return verilog_str_tmp
-    def _buffer_signature(self, verilog_str: str) -> str:
+    def _create_new_labels(self, port_list: List, input_dict: Dict, output_dict: Dict):
         """
-        Buffers content from 'module' to the first ');' in the Verilog code string.
+        Creates new labels for variables based on port list and input/output dictionaries.
 
         Args:
-            verilog_code (str): Verilog code as a single string.
+            port_list (List): List of port names.
+            input_dict (Dict): Dictionary of input ports.
+            output_dict (Dict): Dictionary of output ports.
 
         Returns:
-            str: The complete module declaration as a single string.
-        """
-        buffer = ""  # To accumulate lines
-        inside_module = False  # Flag to detect when we're inside the module declaration
-
-        for line in verilog_str.splitlines():  # Split the single string into lines
-            line = line.strip()  # Remove leading and trailing spaces
-
-            # Check if the line starts with 'module' (beginning of the declaration)
-            if line.startswith("module"):
-                inside_module = True  # Start buffering
-                buffer += line + " "  # Add the line to the buffer
-            elif inside_module:
-                buffer += line + " "  # Continue buffering
-                if ");" in line:  # Check if the module declaration ends
-                    break  # Exit the loop once the module declaration is complete
-
-        return buffer.strip()
-
-    def _extract_module_signature(self, verilog_str: str) -> Tuple[str, List[str]]:
+            Dict: A dictionary mapping old variable names to new labels.
         """
-        Extracts the module name and port list from the Verilog file.
-
-        Args:
-            verilog_str (List[str]): Lines of Verilog code.
+        port_index = {}
+        for p_idx, p in enumerate(port_list):
+            port_index.setdefault(p, p_idx)
 
-        Returns:
-            Tuple[str, List[str]]: The module name and list of port names.
-        """
-        module_name = ''
-        port_list = []
-        buffer = self._buffer_signature(verilog_str)
+        new_labels: Dict = {}
+        for i, _ in input_dict.values():
+            if i in port_index:
+                new_labels[i] = f'in{port_index[i]}'
 
-        match = re.match(r'^module\s+([\w\\]+)\s*\(', buffer)
-        if match:
-            module_name = match.group(1)  # Group 1 captures the module name
-        else:
-            raise ValueError(Fore.RED + "Failed to extract module name. Invalid module declaration.")
+        for o, _ in output_dict.values():
+            if o in port_index:
+                new_labels[o] = f'out{port_index[o] - (len(input_dict))}'
 
-        match = re.search(r'\((.*)\);', buffer, flags=re.DOTALL)
-        if match:
-            ports_str = match.group(1)  # Extract the content inside parentheses
-            # Split ports by comma and remove leading/trailing whitespace
-            port_list = [port.strip() for port in ports_str.split(',') if port.strip()]
-        else:
-            raise ValueError(Fore.RED + "Failed to extract port list. Invalid module declaration.")
-        return module_name, port_list
+        return new_labels
 
-    def _extract_inputs_outputs(self, verilog_str, port_list):
+    def _relabel_nodes(self, verilog_str: str, tokens: List[Tuple[str, str, int]], new_labels: dict) -> str:
         """
-        Extracts inputs and outputs from the Verilog code based on the port list.
+        Relabels variables in a Verilog string based on new_labels mapping.
 
         Args:
-            verilog_str (Union[str, List[str]]): Verilog code as a string or list of lines.
-            port_list (List[str]): List of module ports.
+            verilog_str (str): The Verilog code as a single string.
+            tokens (List[Tuple[str, str, int]]): Tokens of `verilog_str`.
+            new_labels (dict): A dictionary mapping old variable names to new labels.
 
         Returns:
-            Tuple[Dict[str, str], Dict[str, str]]: Input and output dictionaries.
+            str: The Verilog string with relabeled variables.
         """
-        # Ensure verilog_str is a string
-        if isinstance(verilog_str, list):
-            verilog_str = " ".join(line.strip() for line in verilog_str)
-
-
-        # Extract input and output declarations
-        input_decl = re.findall(r'input\s+([^;]+);', verilog_str)
-        output_decl = re.findall(r'output\s+([^;]+);', verilog_str)
-
-
-
-        # Process declarations into individual ports
-        input_ports = []
-        for decl in input_decl:
-            split_ports = [port.strip() for port in re.split(r'[,\s]+', decl) if port.strip()]
-            input_ports.extend(split_ports)
-
-        output_ports = []
-        for decl in output_decl:
-            split_ports = [port.strip() for port in re.split(r'[,\s]+', decl) if port.strip()]
-            output_ports.extend(split_ports)
-
-
-        # convert them into dictionary
-        port_dict = {}
-
-        for p_idx, p in enumerate(port_list):
-            port_dict[p] = p_idx
-
-
-        input_dict = {}
-        for i_idx, i in enumerate(input_ports):
-            if i in port_dict:
-                input_dict[port_dict[i]] = (i, 1)
-
-        output_dict = {}
-        for o_idx, o in enumerate(output_ports):
-            if o in port_dict:
-                output_dict[port_dict[o]] = (o, 1)
-
-
-
-        return input_dict, output_dict
+        pieces = []
+        position = 0
+        for kind, text, start in tokens:
+            if kind == 'ident' and text in new_labels:
+                pieces.append(verilog_str[position:start])
+                pieces.append(new_labels[text])
+                position = start + len(text)
+        pieces.append(verilog_str[position:])
+        return ''.join(pieces)
 
     # def _extract_inputs_outputs(self, verilog_str: List[str], port_list: List[str]):
     #     """
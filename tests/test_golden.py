@@ -0,0 +1,118 @@
+import os
+import random
+import re
+import pytest
+from checker.golden import GoldenModel, UnsupportedConstruct
+
+EXACT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'input', 'exact')
+EXACT_FILES = sorted(f for f in os.listdir(EXACT_DIR) if f.endswith('.v'))
+
+
+# ====================== PYTHON REFERENCES ======================
+# benchmarks name their ports differently, so references map input values to output values in port order
+def reference_sad(x):
+    return [sum(abs(x[0] - other) for other in x[1:])]
+
+
+def reference_gates(path):
+    """Evaluates a single-bit gate netlist assignment by assignment, iterating until every wire is known."""
+    with open(path) as f:
+        assignments = re.findall(r'assign\s+(\w+)\s*=\s*([^;]+);', f.read())
+    outputs = sorted((t for t, _ in assignments if re.fullmatch(r'out\d+', t)), key=lambda t: int(t[3:]))
+
+    def evaluate(x):
+        env = {f'in{i}': value for i, value in enumerate(x)}
+        pending = list(assignments)
+        while pending:
+            ready = [(t, e) for t, e in pending if set(re.findall(r'\w+', e)) <= env.keys()]
+            assert ready, 'combinational loop in the reference netlist'
+            for target, expression in ready:
+                env[target] = eval(expression.replace('~', '1 ^ '), {}, dict(env)) & 1
+            pending = [a for a in pending if a not in ready]
+        return [env[name] for name in outputs]
+    return evaluate
+
+
+REFERENCES = {
+    'adder': lambda x: [x[0] + x[1]],
+    'abs_diff': lambda x: [abs(x[0] - x[1])],
+    'buttfly': lambda x: [x[0] + x[1], x[0] - x[1]],
+    'madd': lambda x: [x[0] * x[1] + x[2]],
+    'mul': lambda x: [x[0] * x[1]],
+    'sad': reference_sad,
+}
+
+
+def samples(model, count=256, seed=0):
+    """All input patterns of small modules, `count` random ones otherwise."""
+    total = sum(width for _, width in model.inputs)
+    words = range(1 << total) if total <= 10 else [random.Random(seed).getrandbits(total) for _ in range(count)]
+    for word in words:
+        values = {}
+        for name, width in model.inputs:
+            values[name] = word & ((1 << width) - 1)
+            word >>= width
+        yield values
+
+
+# ====================== BENCHMARKS ======================
+@pytest.mark.parametrize('file_name', EXACT_FILES)
+def test_exact_benchmark(file_name):
+    path = os.path.join(EXACT_DIR, file_name)
+    model = GoldenModel.from_file(path)
+    if file_name == 'adder_i12_o7_approx.v':
+        # `c` and `c[6]` are both driven, which Verilog resolves to `x`
+        assert model is None
+        return
+    assert model is not None
+
+    if file_name.startswith('adder_') and '_et' in file_name:
+        reference = reference_gates(path)
+    else:
+        reference = REFERENCES[file_name.split('_i')[0]]
+    for values in samples(model):
+        expected = reference([values[name] for name, _ in model.inputs])
+        expected = {name: value % (1 << width) for (name, width), value in zip(model.outputs, expected)}
+        assert model.evaluate(values) == expected
+
+
+# ====================== WIDTH RULES ======================
+def module(body, inputs='input [3:0] a, b;', output='output [3:0] r;'):
+    return GoldenModel.from_string(f'module m(a, b, r);\n{inputs}\n{output}\n{body}\nendmodule\n')
+
+
+@pytest.mark.parametrize('output, a, b, expected', [
+    ('output [3:0] r;', 15, 15, 7),    # the carry is lost in a 4-bit context
+    ('output [4:0] r;', 15, 15, 15),   # and kept in a 5-bit one
+])
+def test_shift_of_sum_uses_the_context_width(output, a, b, expected):
+    assert module('assign r = (a + b) >> 1;', output=output).evaluate({'a': a, 'b': b}) == {'r': expected}
+
+
+@pytest.mark.parametrize('a, b, expected', [(0, 1, 1), (1, 0, 0), (3, 4, 1), (4, 3, 0)])
+def test_comparison_extends_operands_to_the_wider_side(a, b, expected):
+    model = module("assign r = (a - b) == 8'hff;", output='output r;')
+    assert model.evaluate({'a': a, 'b': b}) == {'r': expected}
+
+
+def test_concatenation_is_self_determined():
+    assert module('assign r = {~a};', output='output [7:0] r;').evaluate({'a': 0, 'b': 0}) == {'r': 0x0f}
+    assert module('assign r = ~a;', output='output [7:0] r;').evaluate({'a': 0, 'b': 0}) == {'r': 0xff}
+
+
+def test_part_selects_assemble_the_target():
+    model = module('assign r[3:2] = a[1:0];\nassign r[1:0] = b[3:2];')
+    assert model.evaluate({'a': 0b0001, 'b': 0b1000}) == {'r': 0b0110}
+
+
+# ====================== UNSUPPORTED CONSTRUCTS ======================
+@pytest.mark.parametrize('body', [
+    "assign r = a + 4'b12;",                       # malformed literal
+    "assign r = a;\nassign r[0] = b[0];",          # bits driven twice
+    "wire [3:0] w;\nassign w = r;\nassign r = w;",  # combinational loop
+    "assign r = a + w;",                           # undriven signal
+    "always @(*) r = a;",                          # procedural code
+])
+def test_unsupported_constructs_are_rejected(body):
+    with pytest.raises(UnsupportedConstruct):
+        module(body)